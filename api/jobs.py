@@ -0,0 +1,314 @@
+"""
+Generation job queue.
+
+Jobs run on a bounded pool of worker processes so request latency is
+independent of generation/backtest time. Workers report progress through a
+shared queue drained by a consumer thread; finished jobs are kept in memory
+for GENERATION_JOB_TTL seconds. If a worker dies (OOM, kill) its jobs fail and
+the pool is replaced, so later submissions keep working.
+
+Seeded requests are deterministic for a given data version, so their
+responses also go into an LRU cache and repeated requests skip the pool.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from api.models import (
+    BacktestResult,
+    FilterStageStat,
+    GameResult,
+    GenerationJobRequest,
+    GenerationJobResponse,
+    GenerationStats,
+    PerGameStat,
+    SimulationResult,
+)
+from lottery_intelligence.core.pool import marcar_worker
+
+MAX_WORKERS = int(os.environ.get("GENERATION_WORKERS", "2"))
+MAX_PENDING = int(os.environ.get("GENERATION_MAX_PENDING", "64"))
+JOB_TTL = float(os.environ.get("GENERATION_JOB_TTL", "3600"))
+CACHE_SIZE = int(os.environ.get("GENERATION_CACHE_SIZE", "128"))
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are already queued or running."""
+
+
+def _report(progress_queue, job_id: str, stage: str, percent: float, detail: Optional[str] = None):
+    if progress_queue is not None:
+        progress_queue.put((job_id, {"stage": stage, "percent": percent, "detail": detail}))
+
+
+def run_generation(job_id: str, req: GenerationJobRequest, progress_queue=None) -> GenerationJobResponse:
+    """Generate the hybrid portfolio and (optionally) backtest it. Runs in a worker process."""
+    from lottery_intelligence.core.hybrid import gerar_jogos_hybrid
+    from lottery_intelligence.intelligence.backtest import run_backtest
+
+    loteria = req.loteria.value
+
+    _report(progress_queue, job_id, "generating", 0.0)
+    games_with_meta, stats_info = gerar_jogos_hybrid(loteria, req.orcamento, seed=req.seed)
+
+    games = [
+        GameResult(
+            numbers=g["numbers"],
+            source=g["source"],
+            tag=g["tag"],
+        )
+        for g in games_with_meta
+    ]
+
+    stats = GenerationStats(
+        total_games=stats_info.get("total_games", 0),
+        v3_count=stats_info.get("v3_count", 0),
+        v5_count=stats_info.get("v5_count", 0),
+        filters=[FilterStageStat(**f) for f in stats_info.get("filters", [])],
+    )
+
+    backtest_result = None
+    if req.run_backtest:
+        _report(progress_queue, job_id, "backtest", 60.0, f"{len(games)} games")
+        try:
+            games_only = [g["numbers"] for g in games_with_meta]
+            bt = run_backtest(games_only, loteria, last_n=req.backtest_last_n)
+            if "error" not in bt:
+                backtest_result = BacktestResult(
+                    global_avg=bt["global_avg"],
+                    global_max=bt["global_max"],
+                    per_game_stats=[
+                        PerGameStat(**pgs) for pgs in bt["per_game_stats"]
+                    ],
+                    tested_draws=bt["tested_draws"],
+                )
+        except Exception:
+            pass
+
+    simulation_result = None
+    if req.simulate_draws > 0 and games_with_meta:
+        from lottery_intelligence.intelligence.montecarlo import simular_premios
+
+        def on_progress(done: int, total: int):
+            _report(progress_queue, job_id, "simulating", 70.0 + 29.0 * done / total, f"{done}/{total} draws")
+
+        _report(progress_queue, job_id, "simulating", 70.0, f"0/{req.simulate_draws} draws")
+        sim = simular_premios([g["numbers"] for g in games_with_meta], loteria,
+                              req.simulate_draws, seed=req.seed, progresso=on_progress)
+        if "error" not in sim:
+            simulation_result = SimulationResult(**sim)
+
+    _report(progress_queue, job_id, "done", 100.0)
+    return GenerationJobResponse(
+        job_id=job_id,
+        loteria=req.loteria,
+        orcamento=req.orcamento,
+        seed=req.seed,
+        games=games,
+        stats=stats,
+        backtest=backtest_result,
+        simulation=simulation_result,
+    )
+
+
+def _run_job(job_id: str, req_data: dict, progress_queue) -> dict:
+    # Plain dicts cross the process boundary; models are rebuilt on each side
+    _report(progress_queue, job_id, "running", 0.0)
+    req = GenerationJobRequest(**req_data)
+    return run_generation(job_id, req, progress_queue).model_dump(mode="json")
+
+
+class ResponseCache:
+    """LRU of finished seeded responses (plain dicts)."""
+
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self.max_size = max_size
+        self._items: "OrderedDict[Tuple, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(req: GenerationJobRequest, data_version: Tuple[int, int, int]) -> Optional[Tuple]:
+        if req.seed is None:
+            return None
+        return (req.loteria.value, req.orcamento, req.seed, req.run_backtest,
+                req.backtest_last_n, req.simulate_draws, data_version)
+
+    def get(self, key) -> Optional[dict]:
+        with self._lock:
+            result = self._items.get(key)
+            if result is not None:
+                self._items.move_to_end(key)
+            return result
+
+    def put(self, key, result: dict):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[key] = result
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+class JobManager:
+    """In-memory job registry backed by a process pool."""
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_pending: int = MAX_PENDING, ttl: float = JOB_TTL):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.jobs: Dict[str, dict] = {}
+        self.cache = ResponseCache()
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._ctx = None
+        self._manager = None
+        self._progress = None
+        self._consumer: Optional[threading.Thread] = None
+
+    def _start(self):
+        if self._executor is None:
+            # spawn: uvicorn's process already has threads (threadpool, progress consumer)
+            # and forking a threaded process can deadlock
+            self._ctx = multiprocessing.get_context("spawn")
+            self._manager = self._ctx.Manager()
+            self._progress = self._manager.Queue()
+            self._executor = self._new_executor()
+            self._consumer = threading.Thread(target=self._consume_progress, daemon=True)
+            self._consumer.start()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # Job workers run generation/simulation inline: no nested pool per job
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._ctx,
+                                   initializer=marcar_worker)
+
+    def _replace_executor(self, broken: ProcessPoolExecutor):
+        """
+        Swap a broken pool (a worker died: OOM, kill) for a fresh one. Its
+        queued/running jobs fail through _finish; the manager and the progress
+        queue are kept. Call with self._lock held.
+        """
+        if self._executor is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._new_executor()
+
+    def _consume_progress(self):
+        while True:
+            try:
+                item = self._progress.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            job_id, progress = item
+            with self._lock:
+                job = self.jobs.get(job_id)
+                if job is not None and job["status"] in ("queued", "running"):
+                    job["status"] = "running"
+                    job["progress"] = progress
+
+    def _purge(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job["finished_at"] is not None and now - job["finished_at"] > self.ttl
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def _pending(self) -> int:
+        return sum(1 for job in self.jobs.values() if job["status"] in ("queued", "running"))
+
+    def submit(self, req: GenerationJobRequest, data_version: Optional[Tuple[int, int, int]] = None) -> dict:
+        """
+        Enqueue a generation job. Seeded requests whose response is cached for
+        the current data_version come back already completed.
+        """
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        cache_key = self.cache.key(req, data_version) if data_version is not None else None
+        cached = self.cache.get(cache_key) if cache_key is not None else None
+
+        with self._lock:
+            self._purge()
+            job = {
+                "job_id": job_id,
+                "status": "queued",
+                "progress": {"stage": "queued", "percent": 0.0, "detail": None},
+                "created_at": now,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            if cached is not None:
+                job.update(
+                    status="completed",
+                    progress={"stage": "done", "percent": 100.0, "detail": "cached"},
+                    finished_at=now,
+                    result=dict(cached, job_id=job_id),
+                )
+                self.jobs[job_id] = job
+                return dict(job)
+
+            if self._pending() >= self.max_pending:
+                raise QueueFullError(f"{self.max_pending} generation jobs already pending")
+            self._start()
+            executor = self._executor
+            try:
+                future = executor.submit(_run_job, job_id, req.model_dump(mode="json"), self._progress)
+            except BrokenProcessPool:
+                self._replace_executor(executor)
+                executor = self._executor
+                future = executor.submit(_run_job, job_id, req.model_dump(mode="json"), self._progress)
+            self.jobs[job_id] = job
+        future.add_done_callback(lambda f: self._finish(job_id, f, cache_key, executor))
+        return dict(job)
+
+    def _finish(self, job_id: str, future, cache_key=None, executor: Optional[ProcessPoolExecutor] = None):
+        broken = False
+        try:
+            result, error = future.result(), None
+        except BrokenProcessPool as e:
+            result, error, broken = None, f"Worker process died (out of memory or killed): {e}", True
+        except Exception as e:
+            result, error = None, str(e) or e.__class__.__name__
+        if result is not None and cache_key is not None:
+            self.cache.put(cache_key, result)
+
+        with self._lock:
+            if broken and executor is not None:
+                self._replace_executor(executor)
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            if error is None:
+                job["result"] = result
+                job["status"] = "completed"
+                job["progress"] = {"stage": "done", "percent": 100.0, "detail": None}
+            else:
+                job["status"] = "failed"
+                job["error"] = error
+            job["finished_at"] = time.time()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            self._purge()
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._progress.put(None)
+            self._manager.shutdown()
+            self._executor = None
+
+
+job_manager = JobManager()
@@ -5,12 +5,37 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.routers import health, lotteries, generation
+from api.jobs import job_manager
+from api.routers import admin, health, lotteries, generation
+from lottery_intelligence.core.config import CONFIG_LOTERIAS
+from lottery_intelligence.core.db import carregar_em_memoria, db_disponivel, fechar_conexoes
+from lottery_intelligence.core.snapshot import obter_snapshot
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # DB_MEMORIA=1: as leituras deste processo vêm de uma cópia da base em memória
+    # (os workers dos jobs de geração continuam lendo do arquivo)
+    if os.environ.get("DB_MEMORIA") == "1":
+        carregar_em_memoria()
+    # Pré-aquece o cache de snapshots: a primeira requisição já cai no cache
+    if db_disponivel():
+        for loteria in CONFIG_LOTERIAS:
+            try:
+                obter_snapshot(loteria)
+            except Exception:
+                pass
+    yield
+    job_manager.shutdown()
+    fechar_conexoes()
+
 
-app = FastAPI(title="Lottery Reducer API", version="1.0.0")
+app = FastAPI(title="Lottery Reducer API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,3 +51,4 @@ app.add_middleware(
 app.include_router(health.router)
 app.include_router(lotteries.router)
 app.include_router(generation.router)
+app.include_router(admin.router)
@@ -15,6 +15,8 @@ class GenerationJobRequest(BaseModel):
     orcamento: float = Field(gt=0, le=500)
     run_backtest: bool = True
     backtest_last_n: int = Field(default=0, ge=0)
+    seed: Optional[int] = Field(default=None, ge=0)
+    simulate_draws: int = Field(default=0, ge=0, le=20_000_000)  # 0 = no Monte Carlo simulation
 
 
 class GameResult(BaseModel):
@@ -23,10 +25,19 @@ class GameResult(BaseModel):
     tag: str
 
 
+class FilterStageStat(BaseModel):
+    nome: str
+    avaliados: int
+    rejeitados: int
+    taxa_rejeicao: float
+    custo_us: float
+
+
 class GenerationStats(BaseModel):
     total_games: int
     v3_count: int
     v5_count: int
+    filters: List[FilterStageStat] = []
 
 
 class PerGameStat(BaseModel):
@@ -34,6 +45,7 @@ class PerGameStat(BaseModel):
     avg_hits: float
     max_hits: int
     min_hits: int
+    hit_histogram: List[int] = []
 
 
 class BacktestResult(BaseModel):
@@ -43,13 +55,60 @@ class BacktestResult(BaseModel):
     tested_draws: int
 
 
+class SimulationTier(BaseModel):
+    hits: int
+    prize: float
+    p_portfolio: float
+    p_portfolio_ci95: List[float]
+    p_per_game: float
+    p_per_game_ci95: List[float]
+
+
+class SimulationResult(BaseModel):
+    simulated_draws: int
+    games: int
+    seed: Optional[int] = None
+    cost: float
+    expected_return: float
+    expected_return_ci95: List[float]
+    return_per_cost: float
+    p_any_prize: float
+    p_any_prize_ci95: List[float]
+    tiers: List[SimulationTier]
+
+
 class GenerationJobResponse(BaseModel):
     job_id: str
     loteria: LotteryName
     orcamento: float
+    seed: Optional[int] = None
     games: List[GameResult]
     stats: GenerationStats
     backtest: Optional[BacktestResult] = None
+    simulation: Optional[SimulationResult] = None
+    error: Optional[str] = None
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class JobProgress(BaseModel):
+    stage: str
+    percent: float = 0.0
+    detail: Optional[str] = None
+
+
+class GenerationJobStatus(BaseModel):
+    job_id: str
+    status: JobStatus
+    progress: JobProgress
+    created_at: float
+    finished_at: Optional[float] = None
+    result: Optional[GenerationJobResponse] = None
     error: Optional[str] = None
 
 
@@ -69,3 +128,23 @@ class HealthResponse(BaseModel):
     status: str
     db_exists: bool
     db_tables: List[str]
+
+
+class SyncRequest(BaseModel):
+    loterias: Optional[List[LotteryName]] = None  # None = all lotteries
+    full: bool = False
+
+
+class SyncSourceResult(BaseModel):
+    loteria: LotteryName
+    status: str  # not_modified | unchanged | downloaded | failed
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    rejected: int = 0
+    skipped: int = 0
+
+
+class SyncResponse(BaseModel):
+    results: List[SyncSourceResult]
+    elapsed_seconds: float
@@ -0,0 +1,65 @@
+import os
+import secrets
+import sqlite3
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+
+from api.models import SyncRequest, SyncResponse, SyncSourceResult
+from lottery_intelligence.core.db import carregar_em_memoria, modo_memoria
+from lottery_intelligence.core.etl import sincronizar
+
+router = APIRouter()
+
+# Admin endpoints are disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+_SOURCE_STATUS = {
+    "nao_modificada": "not_modified",
+    "mesmo_hash": "unchanged",
+    "baixada": "downloaded",
+}
+
+
+def _check_token(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if token is None or not secrets.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.post("/api/admin/sync", response_model=SyncResponse)
+def sync_lotteries(req: SyncRequest, x_admin_token: Optional[str] = Header(default=None)):
+    _check_token(x_admin_token)
+
+    start = time.perf_counter()
+    loterias = [l.value for l in req.loterias] if req.loterias else None
+    try:
+        results = sincronizar(loterias, completo=req.full)
+    except sqlite3.OperationalError as e:
+        # Default deployment mounts loterias.db read-only: sync runs on the host
+        raise HTTPException(
+            status_code=503,
+            detail=f"Database is not writable here ({e}); run `cli.py sync` on the host",
+        )
+
+    # Reads served from the in-memory copy only see new draws after a reload
+    if modo_memoria() and any(r is not None and r["fonte"] == "baixada" for r in results.values()):
+        carregar_em_memoria()
+
+    return SyncResponse(
+        results=[
+            SyncSourceResult(loteria=loteria, status="failed") if r is None else SyncSourceResult(
+                loteria=loteria,
+                status=_SOURCE_STATUS[r["fonte"]],
+                inserted=r["inseridos"],
+                updated=r["atualizados"],
+                unchanged=r["inalterados"],
+                rejected=r["rejeitados"],
+                skipped=r["ignorados"],
+            )
+            for loteria, r in results.items()
+        ],
+        elapsed_seconds=round(time.perf_counter() - start, 3),
+    )
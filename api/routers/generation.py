@@ -1,71 +1,46 @@
-import os
-import uuid
-
 from fastapi import APIRouter, HTTPException
 
+from api.jobs import QueueFullError, job_manager
 from api.models import (
-    BacktestResult,
-    GameResult,
     GenerationJobRequest,
     GenerationJobResponse,
-    GenerationStats,
-    PerGameStat,
+    GenerationJobStatus,
 )
-from lottery_intelligence.core.hybrid import gerar_jogos_hybrid
-from lottery_intelligence.intelligence.backtest import run_backtest
+from lottery_intelligence.core.db import db_disponivel
+from lottery_intelligence.core.snapshot import versao_dados
 
 router = APIRouter()
 
-DB_PATH = "loterias.db"
-
 
-@router.post("/api/generation-jobs", response_model=GenerationJobResponse)
+@router.post("/api/generation-jobs", response_model=GenerationJobStatus, status_code=202)
 def create_generation_job(req: GenerationJobRequest):
-    if not os.path.isfile(DB_PATH):
+    if not db_disponivel():
         raise HTTPException(status_code=503, detail="Database not available")
 
-    job_id = str(uuid.uuid4())
-    loteria = req.loteria.value
-
-    games_with_meta, stats_info = gerar_jogos_hybrid(loteria, req.orcamento)
-
-    games = [
-        GameResult(
-            numbers=g["numbers"],
-            source=g["source"],
-            tag=g["tag"],
-        )
-        for g in games_with_meta
-    ]
-
-    stats = GenerationStats(
-        total_games=stats_info.get("total_games", 0),
-        v3_count=stats_info.get("v3_count", 0),
-        v5_count=stats_info.get("v5_count", 0),
-    )
-
-    backtest_result = None
-    if req.run_backtest:
-        try:
-            games_only = [g["numbers"] for g in games_with_meta]
-            bt = run_backtest(games_only, loteria, last_n=req.backtest_last_n)
-            if "error" not in bt:
-                backtest_result = BacktestResult(
-                    global_avg=bt["global_avg"],
-                    global_max=bt["global_max"],
-                    per_game_stats=[
-                        PerGameStat(**pgs) for pgs in bt["per_game_stats"]
-                    ],
-                    tested_draws=bt["tested_draws"],
-                )
-        except Exception:
-            pass
-
-    return GenerationJobResponse(
-        job_id=job_id,
-        loteria=req.loteria,
-        orcamento=req.orcamento,
-        games=games,
-        stats=stats,
-        backtest=backtest_result,
-    )
+    # Seeded responses are cached per data version
+    data_version = versao_dados(req.loteria.value) if req.seed is not None else None
+
+    try:
+        return job_manager.submit(req, data_version)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+@router.get("/api/generation-jobs/{job_id}", response_model=GenerationJobStatus)
+def get_generation_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@router.get("/api/generation-jobs/{job_id}/result", response_model=GenerationJobResponse)
+def get_generation_job_result(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return job["result"]
@@ -1,29 +1,25 @@
-import os
 import sqlite3
 
 from fastapi import APIRouter
 
 from api.models import HealthResponse
+from lottery_intelligence.core.db import conexao_leitura, db_disponivel
 
 router = APIRouter()
 
-DB_PATH = "loterias.db"
-
 
 @router.get("/api/health", response_model=HealthResponse)
 def health():
-    db_exists = os.path.isfile(DB_PATH)
+    db_exists = db_disponivel()
     tables: list[str] = []
 
     if db_exists:
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.execute(
+            cursor = conexao_leitura().execute(
                 "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name"
             )
             tables = [row[0] for row in cursor.fetchall()]
-            conn.close()
-        except Exception:
+        except sqlite3.Error:
             pass
 
     return HealthResponse(
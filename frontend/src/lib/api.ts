@@ -23,6 +23,8 @@ export interface GenerationJobRequest {
   orcamento: number;
   run_backtest?: boolean;
   backtest_last_n?: number;
+  seed?: number;
+  simulate_draws?: number;
 }
 
 export interface GameResult {
@@ -31,10 +33,19 @@ export interface GameResult {
   tag: string;
 }
 
+export interface FilterStageStat {
+  nome: string;
+  avaliados: number;
+  rejeitados: number;
+  taxa_rejeicao: number;
+  custo_us: number;
+}
+
 export interface GenerationStats {
   total_games: number;
   v3_count: number;
   v5_count: number;
+  filters?: FilterStageStat[];
 }
 
 export interface PerGameStat {
@@ -42,6 +53,7 @@ export interface PerGameStat {
   avg_hits: number;
   max_hits: number;
   min_hits: number;
+  hit_histogram?: number[];
 }
 
 export interface BacktestResult {
@@ -51,16 +63,60 @@ export interface BacktestResult {
   tested_draws: number;
 }
 
+export interface SimulationTier {
+  hits: number;
+  prize: number;
+  p_portfolio: number;
+  p_portfolio_ci95: number[];
+  p_per_game: number;
+  p_per_game_ci95: number[];
+}
+
+export interface SimulationResult {
+  simulated_draws: number;
+  games: number;
+  seed: number | null;
+  cost: number;
+  expected_return: number;
+  expected_return_ci95: number[];
+  return_per_cost: number;
+  p_any_prize: number;
+  p_any_prize_ci95: number[];
+  tiers: SimulationTier[];
+}
+
 export interface GenerationJobResponse {
   job_id: string;
   loteria: string;
   orcamento: number;
+  seed: number | null;
   games: GameResult[];
   stats: GenerationStats;
   backtest: BacktestResult | null;
+  simulation: SimulationResult | null;
+  error: string | null;
+}
+
+export type JobStatus = "queued" | "running" | "completed" | "failed";
+
+export interface JobProgress {
+  stage: string;
+  percent: number;
+  detail: string | null;
+}
+
+export interface GenerationJobStatus {
+  job_id: string;
+  status: JobStatus;
+  progress: JobProgress;
+  created_at: number;
+  finished_at: number | null;
+  result: GenerationJobResponse | null;
   error: string | null;
 }
 
+const JOB_POLL_INTERVAL_MS = 1000;
+
 export async function fetchHealth(): Promise<HealthResponse> {
   const res = await fetch(`${BASE_URL}/api/health`);
   if (!res.ok) throw new Error(`Health check failed: ${res.status}`);
@@ -73,8 +129,20 @@ export async function fetchLotteries(): Promise<LotteriesResponse> {
   return res.json();
 }
 
+export async function fetchGenerationJob(
+  jobId: string
+): Promise<GenerationJobStatus> {
+  const res = await fetch(`${BASE_URL}/api/generation-jobs/${jobId}`);
+  if (!res.ok) {
+    const detail = await res.text();
+    throw new Error(`Failed to fetch job (${res.status}): ${detail}`);
+  }
+  return res.json();
+}
+
 export async function createGenerationJob(
-  req: GenerationJobRequest
+  req: GenerationJobRequest,
+  onProgress?: (progress: JobProgress) => void
 ): Promise<GenerationJobResponse> {
   const res = await fetch(`${BASE_URL}/api/generation-jobs`, {
     method: "POST",
@@ -85,5 +153,15 @@ export async function createGenerationJob(
     const detail = await res.text();
     throw new Error(`Generation failed (${res.status}): ${detail}`);
   }
-  return res.json();
+
+  let job: GenerationJobStatus = await res.json();
+  while (job.status === "queued" || job.status === "running") {
+    onProgress?.(job.progress);
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    job = await fetchGenerationJob(job.job_id);
+  }
+  if (job.status === "failed" || !job.result) {
+    throw new Error(`Generation failed: ${job.error ?? "unknown error"}`);
+  }
+  return job.result;
 }
@@ -1,38 +1,43 @@
 
-import secrets
 import collections
+import os
+import sys
 import time
 from typing import List, Tuple
 
+# Adiciona o diretório pai ao path para importar pacotes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lottery_intelligence.core.simulacao import FonteSorteios, simular_sorteios as simular_motor
+
 # Configurações da Mega da Virada
 NUMER0S_TOTAIS = 60
 DEZENAS_POR_JOGO = 6
 TOTAL_SIMULACOES = 1_000_000
 
 def gerar_jogo_aleatorio() -> List[int]:
-    """Gera um jogo aleatório simples usando secrets (CSPRNG)."""
-    jogo = set()
-    while len(jogo) < DEZENAS_POR_JOGO:
-        # secrets.randbelow(60) retorna 0-59, então somamos 1
-        jogo.add(secrets.randbelow(NUMER0S_TOTAIS) + 1)
-    return sorted(list(jogo))
+    """Gera um jogo aleatório simples com os.urandom (CSPRNG)."""
+    fonte = FonteSorteios(NUMER0S_TOTAIS, DEZENAS_POR_JOGO, csprng=True)
+    return sorted(int(n) for n in fonte.dezenas(1)[0])
 
 def simular_sorteios(n_simulacoes: int) -> collections.Counter:
     """
     Simula n sorteios e contabiliza a frequência de cada dezena.
     Retorna um Counter com as frequências.
+
+    Os sorteios são gerados em blocos pelo motor core/simulacao.py (CSPRNG).
     """
-    frequencia = collections.Counter()
     print(f"Iniciando simulação de {n_simulacoes} sorteios...")
     start_time = time.time()
-    
-    for i in range(n_simulacoes):
-        jogo = gerar_jogo_aleatorio()
-        frequencia.update(jogo)
-        
-        if (i + 1) % (n_simulacoes // 10) == 0:
-            print(f"Progresso: {(i + 1) / n_simulacoes * 100:.0f}%")
-            
+
+    def progresso(feitos, total):
+        print(f"Progresso: {feitos / total * 100:.0f}%")
+
+    resultado = simular_motor('megasena', n_simulacoes, csprng=True, progresso=progresso)
+    frequencia = collections.Counter({
+        dezena: int(vezes) for dezena, vezes in enumerate(resultado['frequencia'], start=1)
+    })
+
     end_time = time.time()
     duration = end_time - start_time
     print(f"Simulação concluída em {duration:.2f} segundos.")
@@ -52,7 +57,7 @@ def main():
     print("="*50)
     print(f"SIMULADOR MEGA DA VIRADA 2025 (R$ 1 BILHÃO)")
     print("="*50)
-    print(f"Gerador: Python secrets (Criptograficamente Seguro)")
+    print(f"Gerador: os.urandom em lote (Criptograficamente Seguro)")
     print(f"Simulações: {TOTAL_SIMULACOES}")
     print("-" * 50)
     
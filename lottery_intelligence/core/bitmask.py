@@ -0,0 +1,111 @@
+"""
+Codificação de jogos em bitmask de largura fixa (V6.1)
+A dezena n ocupa o bit n-1. Cada máscara tem MASK_WORDS palavras uint64
+(128 bits), suficiente para as 100 dezenas da Lotomania.
+"""
+
+import numpy as np
+from typing import Iterable, List
+
+MASK_WORDS = 2
+MASK_BITS = 64 * MASK_WORDS
+MASK_BYTES = 8 * MASK_WORDS
+
+_WORD = (1 << 64) - 1
+_POPCOUNT_LUT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def encode_game(jogo: Iterable[int]) -> int:
+    """Converte um jogo (lista de dezenas) em um inteiro bitmask."""
+    mask = 0
+    for n in jogo:
+        n = int(n)
+        if not 1 <= n <= MASK_BITS:
+            raise ValueError(f"Dezena fora do intervalo suportado: {n}")
+        mask |= 1 << (n - 1)
+    return mask
+
+def decode_mask(mask: int) -> List[int]:
+    """Converte um bitmask de volta para a lista ordenada de dezenas."""
+    jogo = []
+    n = 1
+    while mask:
+        if mask & 1:
+            jogo.append(n)
+        mask >>= 1
+        n += 1
+    return jogo
+
+def mask_to_blob(mask: int) -> bytes:
+    """Serializa o bitmask para a coluna BLOB (little-endian, largura fixa)."""
+    return mask.to_bytes(MASK_BYTES, 'little')
+
+def blob_to_mask(blob: bytes) -> int:
+    return int.from_bytes(blob, 'little')
+
+def games_to_masks(jogos: Iterable[Iterable[int]]) -> np.ndarray:
+    """Retorna uma matriz (N, MASK_WORDS) uint64 com a máscara de cada jogo."""
+    masks = [encode_game(j) for j in jogos]
+    out = np.zeros((len(masks), MASK_WORDS), dtype=np.uint64)
+    for i, mask in enumerate(masks):
+        for w in range(MASK_WORDS):
+            out[i, w] = (mask >> (64 * w)) & _WORD
+    return out
+
+def blobs_to_masks(blobs: List[bytes]) -> np.ndarray:
+    """Converte os BLOBs lidos do banco direto para a matriz (N, MASK_WORDS)."""
+    if not blobs:
+        return np.zeros((0, MASK_WORDS), dtype=np.uint64)
+    buf = b''.join(blobs)
+    return np.frombuffer(buf, dtype='<u8').reshape(-1, MASK_WORDS).astype(np.uint64)
+
+def masks_to_matrix(masks: np.ndarray, total_nums: int) -> np.ndarray:
+    """Expande as máscaras em uma matriz 0/1 (N, total_nums) uint8."""
+    masks = np.ascontiguousarray(masks, dtype='<u8').reshape(-1, MASK_WORDS)
+    # Largura explícita: com N = 0 o reshape(-1) não tem como inferir a coluna
+    bits = np.unpackbits(masks.view(np.uint8).reshape(len(masks), MASK_BYTES), axis=1, bitorder='little')
+    return bits[:, :total_nums]
+
+def games_to_matrix(jogos: Iterable[Iterable[int]], total_nums: int) -> np.ndarray:
+    """Matriz 0/1 (N, total_nums) uint8 direto das listas de dezenas."""
+    jogos = [list(j) for j in jogos]
+    matrix = np.zeros((len(jogos), total_nums), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(jogos)), [len(j) for j in jogos])
+    cols = np.fromiter((int(n) - 1 for j in jogos for n in j), dtype=np.int64, count=len(rows))
+    if ((cols < 0) | (cols >= total_nums)).any():
+        raise ValueError(f"Dezena fora do intervalo 1..{total_nums}")
+    matrix[rows, cols] = 1
+    return matrix
+
+def matrix_to_games(matrix: np.ndarray) -> List[List[int]]:
+    """Converte uma matriz 0/1 (N, total_nums) de volta para listas de dezenas."""
+    return [[int(n) + 1 for n in np.flatnonzero(row)] for row in matrix]
+
+def masks_to_games(masks: np.ndarray) -> List[List[int]]:
+    """Decodifica uma matriz de máscaras para listas de dezenas."""
+    return matrix_to_games(masks_to_matrix(masks, MASK_BITS))
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Contagem de bits por palavra uint64 (np.bitwise_count no NumPy 2.x)."""
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    counts = _POPCOUNT_LUT[words.view(np.uint8)]
+    return counts.reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+def count_hits(games: np.ndarray, draws: np.ndarray, chunk_size: int = 1 << 20) -> np.ndarray:
+    """
+    Kernel de acertos: retorna a matriz (G, D) com |jogo & sorteio| para
+    todos os pares. Processa em blocos para limitar a memória intermediária.
+    """
+    games = np.asarray(games, dtype=np.uint64).reshape(-1, MASK_WORDS)
+    draws = np.asarray(draws, dtype=np.uint64).reshape(-1, MASK_WORDS)
+    hits = np.zeros((len(games), len(draws)), dtype=np.uint8)
+    if len(games) == 0 or len(draws) == 0:
+        return hits
+
+    rows = max(1, chunk_size // len(draws))
+    for start in range(0, len(games), rows):
+        block = games[start:start + rows]
+        inter = block[:, None, :] & draws[None, :, :]
+        hits[start:start + rows] = popcount(inter).sum(axis=-1, dtype=np.uint8)
+    return hits
@@ -0,0 +1,107 @@
+"""
+Codec Combinádico (V6.1)
+Mapeia cada k-subconjunto de um pool para um único inteiro (rank colexicográfico)
+e de volta. Permite sortear combinações sem reposição direto no intervalo de
+ranks (sem materializar itertools.combinations) e deduplicar jogos com um set
+de inteiros em vez de varrer listas.
+
+Ordem colex: o subconjunto de posições c_1 < c_2 < ... < c_k tem
+rank = C(c_1, 1) + C(c_2, 2) + ... + C(c_k, k).
+"""
+
+from math import comb
+from typing import Iterable, List
+import numpy as np
+
+# Acima disso os ranks não cabem em int64 (sorteio vetorizado indisponível)
+RANK_MAXIMO = 1 << 62
+
+def rank(posicoes: Iterable[int]) -> int:
+    """Rank colex de um conjunto de posições (base 0)."""
+    return sum(comb(c, i) for i, c in enumerate(sorted(int(p) for p in posicoes), 1))
+
+def unrank(r: int, k: int) -> List[int]:
+    """Posições (base 0, crescentes) do subconjunto de rank r."""
+    posicoes = []
+    r = int(r)
+    for i in range(k, 0, -1):
+        c = i - 1
+        while comb(c + 1, i) <= r:
+            c += 1
+        posicoes.append(c)
+        r -= comb(c, i)
+    return posicoes[::-1]
+
+def rank_jogo(jogo: Iterable[int]) -> int:
+    """Rank do jogo no universo da loteria (dezena n = posição n-1): chave de dedup."""
+    return rank(int(n) - 1 for n in jogo)
+
+class CombinationSpace:
+    """
+    Espaço C(len(pool), k) das combinações de um pool, com sorteio preguiçoso
+    sem reposição: cada chamada a sortear() devolve combinações ainda não vistas.
+    rng: np.random.Generator (fluxo independente por shard/seed).
+    """
+
+    def __init__(self, pool, k: int, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.pool = np.asarray(pool, dtype=np.int64)
+        self.k = int(k)
+        self.total = comb(len(self.pool), self.k)
+        if self.total > RANK_MAXIMO:
+            raise ValueError(f"Espaço C({len(self.pool)},{self.k}) grande demais para ranks int64")
+        # tabela[i - 1, c] = C(c, i), usada no unrank vetorizado
+        n = len(self.pool)
+        self._tabela = np.array([[min(comb(c, i), RANK_MAXIMO) for c in range(n)]
+                                 for i in range(1, self.k + 1)], dtype=np.int64).reshape(self.k, n)
+        self._posicao = {int(x): i for i, x in enumerate(self.pool)}
+        self.vistos = set()
+
+    @property
+    def restantes(self) -> int:
+        return self.total - len(self.vistos)
+
+    def rank(self, jogo: Iterable[int]) -> int:
+        return rank(self._posicao[int(n)] for n in jogo)
+
+    def unrank(self, r: int) -> List[int]:
+        return sorted(int(self.pool[c]) for c in unrank(r, self.k))
+
+    def unrank_lote(self, ranks: np.ndarray) -> np.ndarray:
+        """Matriz (m, k) com as dezenas (ordenadas) de cada rank."""
+        restos = np.asarray(ranks, dtype=np.int64).copy()
+        posicoes = np.zeros((len(restos), self.k), dtype=np.int64)
+        for i in range(self.k, 0, -1):
+            linha = self._tabela[i - 1]
+            c = np.searchsorted(linha, restos, side='right') - 1
+            posicoes[:, i - 1] = c
+            restos -= linha[c]
+        return np.sort(self.pool[posicoes], axis=1)
+
+    def sortear(self, n: int) -> np.ndarray:
+        """
+        Até n combinações inéditas (matriz m x k). Sorteia ranks uniformes e
+        descarta os já vistos; depois de consumir metade do espaço passa a
+        embaralhar só os ranks restantes.
+        """
+        n = min(int(n), self.restantes)
+        if n <= 0:
+            return np.zeros((0, self.k), dtype=np.int64)
+
+        if len(self.vistos) * 2 >= self.total:
+            livres = np.setdiff1d(np.arange(self.total, dtype=np.int64),
+                                  np.fromiter(self.vistos, dtype=np.int64, count=len(self.vistos)))
+            novos = self.rng.permutation(livres)[:n]
+        else:
+            novos = []
+            while len(novos) < n:
+                for r in self.rng.integers(0, self.total, size=2 * (n - len(novos)), dtype=np.int64).tolist():
+                    if r not in self.vistos:
+                        self.vistos.add(r)
+                        novos.append(r)
+                        if len(novos) == n:
+                            break
+            novos = np.asarray(novos, dtype=np.int64)
+
+        self.vistos.update(novos.tolist())
+        return self.unrank_lote(novos)
@@ -0,0 +1,196 @@
+"""
+Índice do Espaço de Combinações da Lotofácil (V6.1)
+A Lotofácil tem apenas C(25,15) = 3.268.760 jogos possíveis. O build enumera
+todos uma única vez para um arquivo .npy memory-mapped com o bitmask (25 bits)
+e as features estáticas dos filtros (soma, primos, fibonacci, sequência).
+
+A posição de cada linha é o rank colexicográfico da combinação: enumerar as
+máscaras em ordem crescente de valor é exatamente a ordem colex.
+
+Os geradores sorteiam direto do conjunto de combinações válidas em vez de
+fazer rejection sampling; o mmap é compartilhado entre workers pelo page cache.
+"""
+
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+from .config import LOTOFACIL_INDEX_PATH
+from .bitmask import popcount
+from .filters import AdvancedFilters, FIBONACCI, FEATURES_COM_ULTIMO
+
+TOTAL_NUMS = 25
+ESCOLHE = 15
+TOTAL_COMBINACOES = 3268760  # C(25, 15)
+
+INDEX_DTYPE = np.dtype([
+    ('mask', '<u4'),
+    ('soma', '<u2'),  # até 270 (11..25)
+    ('primos', 'u1'),
+    ('fibonacci', 'u1'),
+    ('sequencia', 'u1'),
+])
+
+def _mask_de(numeros) -> int:
+    mask = 0
+    for n in numeros:
+        mask |= 1 << (int(n) - 1)
+    return mask
+
+PRIMOS_MASK = _mask_de(n for n in range(1, TOTAL_NUMS + 1) if AdvancedFilters.is_prime(n))
+FIBONACCI_MASK = _mask_de(n for n in range(1, TOTAL_NUMS + 1) if n in FIBONACCI)
+PARES_MASK = _mask_de(range(2, TOTAL_NUMS + 1, 2))
+
+def _popcount32(masks: np.ndarray) -> np.ndarray:
+    return popcount(masks.astype(np.uint64)).astype(np.uint8)
+
+def _features(masks: np.ndarray) -> np.ndarray:
+    """Monta as linhas do índice (features estáticas) para um bloco de máscaras."""
+    linhas = np.zeros(len(masks), dtype=INDEX_DTYPE)
+    linhas['mask'] = masks
+
+    soma = np.zeros(len(masks), dtype=np.uint16)
+    for bit in range(TOTAL_NUMS):
+        soma += ((masks >> bit) & 1).astype(np.uint16) * (bit + 1)
+    linhas['soma'] = soma
+    linhas['primos'] = _popcount32(masks & PRIMOS_MASK)
+    linhas['fibonacci'] = _popcount32(masks & FIBONACCI_MASK)
+
+    # Maior sequência: cada x &= x >> 1 encurta todas as corridas em 1
+    seq = np.zeros(len(masks), dtype=np.uint8)
+    x = masks.copy()
+    while x.any():
+        seq += x != 0
+        x &= x >> 1
+    linhas['sequencia'] = seq
+    return linhas
+
+def build_index(path: str = LOTOFACIL_INDEX_PATH, chunk_bits: int = 22) -> str:
+    """
+    Enumera todas as combinações 15-de-25 (ordem colex) e grava o índice.
+    Passo único (~segundos); o arquivo final tem ~29 MB.
+    """
+    print(f"[Index] Enumerando C({TOTAL_NUMS},{ESCOLHE}) = {TOTAL_COMBINACOES} combinações...")
+    tmp_path = path + ".tmp"
+    index = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=INDEX_DTYPE, shape=(TOTAL_COMBINACOES,))
+
+    pos = 0
+    chunk = 1 << chunk_bits
+    for inicio in range(0, 1 << TOTAL_NUMS, chunk):
+        masks = np.arange(inicio, inicio + chunk, dtype=np.uint32)
+        masks = masks[_popcount32(masks) == ESCOLHE]
+        index[pos:pos + len(masks)] = _features(masks)
+        pos += len(masks)
+
+    if pos != TOTAL_COMBINACOES:
+        raise RuntimeError(f"Enumeração inconsistente: {pos} != {TOTAL_COMBINACOES}")
+    index.flush()
+    del index
+    os.replace(tmp_path, path)
+    print(f"[Index] Índice salvo em: {path}")
+    return path
+
+class LotofacilIndex:
+    """Acesso (read-only, mmap) ao índice e às junções por requisição."""
+    _instancia = None
+    _lock = threading.Lock()
+
+    def __init__(self, path: str = LOTOFACIL_INDEX_PATH):
+        self.path = path
+        self.index = np.load(path, mmap_mode='r')
+        if self.index.dtype != INDEX_DTYPE or len(self.index) != TOTAL_COMBINACOES:
+            raise ValueError(f"Índice inválido: {path}")
+        # Subconjuntos estruturais (núcleo obrigatório + dezenas permitidas)
+        self._subconjuntos = OrderedDict()
+        # Máscaras aprovadas por (subconjunto, último concurso, filtros), com as
+        # medidas da avaliação e os pipelines que já as receberam
+        self._validos = OrderedDict()
+
+    @classmethod
+    def carregar(cls) -> Optional['LotofacilIndex']:
+        """Índice compartilhado do processo, ou None se o build ainda não foi feito."""
+        if cls._instancia is None:
+            with cls._lock:
+                if cls._instancia is None and os.path.isfile(LOTOFACIL_INDEX_PATH):
+                    try:
+                        cls._instancia = cls()
+                    except Exception as e:
+                        print(f"[Index] Ignorando índice ({e})")
+                        return None
+        return cls._instancia
+
+    def subconjunto(self, obrigatorias, permitidas) -> np.ndarray:
+        """
+        Linhas cujas combinações contêm todas as obrigatórias e só usam dezenas
+        permitidas. Cacheado (LRU): o mesmo núcleo/pool se repete entre blocos.
+        """
+        obrig = _mask_de(obrigatorias)
+        perm = _mask_de(permitidas) | obrig
+        chave = (obrig, perm)
+        with self._lock:
+            if chave in self._subconjuntos:
+                self._subconjuntos.move_to_end(chave)
+                return self._subconjuntos[chave]
+
+        masks = self.index['mask']
+        linhas = np.flatnonzero(((masks & obrig) == obrig) & ((masks & ~np.uint32(perm)) == 0))
+        sub = np.asarray(self.index[linhas])
+
+        with self._lock:
+            self._subconjuntos[chave] = sub
+            while len(self._subconjuntos) > 32:
+                self._subconjuntos.popitem(last=False)
+        return sub
+
+    def validos(self, obrigatorias, permitidas, ultimo_resultado, pipeline) -> np.ndarray:
+        """
+        Máscaras (uint32) das combinações do subconjunto aprovadas no pipeline.
+        As features estáticas vêm do índice; 'repetidas' é a junção por
+        requisição com o último concurso (popcount da interseção).
+
+        O resultado é cacheado (LRU) com as medidas da avaliação: os blocos
+        seguintes com o mesmo núcleo/pool/último concurso não reavaliam o
+        subconjunto. Cada pipeline (requisição) recebe essas medidas uma vez
+        por entrada, então o relatório dele mostra a avaliação do subconjunto
+        como se ela tivesse rodado ali, sem somar de novo a cada bloco.
+        """
+        ultimo = _mask_de(ultimo_resultado) if ultimo_resultado else None
+        filtros = tuple(sorted((e.nome, e.feature, e.min, e.max) for e in pipeline.estagios))
+        chave = (_mask_de(obrigatorias), _mask_de(permitidas), ultimo, filtros)
+        with self._lock:
+            entrada = self._validos.get(chave)
+            if entrada is not None:
+                self._validos.move_to_end(chave)
+                validos, medidas, n, registrados = entrada
+                repassar = pipeline not in registrados
+                registrados.add(pipeline)
+        if entrada is not None:
+            if repassar:
+                pipeline.registrar(medidas, n)
+            return validos
+
+        sub = self.subconjunto(obrigatorias, permitidas)
+
+        def calcular(feature, vivos):
+            if feature in FEATURES_COM_ULTIMO:
+                return _popcount32(sub['mask'][vivos] & ultimo) if ultimo is not None else None
+            if feature == 'pares':
+                return _popcount32(sub['mask'][vivos] & PARES_MASK)
+            return sub[feature][vivos]
+
+        medidas = []
+        validos = sub['mask'][pipeline.avaliar_features(len(sub), calcular, medidas)]
+
+        with self._lock:
+            self._validos[chave] = (validos, medidas, len(sub), weakref.WeakSet([pipeline]))
+            while len(self._validos) > 32:
+                self._validos.popitem(last=False)
+        return validos
+
+def masks_to_matrix25(masks: np.ndarray) -> np.ndarray:
+    """Máscaras de 25 bits (uint32) para a matriz 0/1 (N x 25)."""
+    masks = np.ascontiguousarray(masks, dtype='<u4')
+    bits = np.unpackbits(masks.view(np.uint8).reshape(len(masks), 4), axis=1, bitorder='little')
+    return bits[:, :TOTAL_NUMS]
@@ -1,7 +1,47 @@
 
+import os
+
 # --- CONFIGURAÇÃO ---
 DB_PATH = "loterias.db"
-URL_BASE = "https://raw.githubusercontent.com/guilhermeasn/loteria.json/master/data/"
+MODEL_CACHE_DIR = "modelos"  # Modelos LotteryAI treinados (cache em disco)
+LOTOFACIL_INDEX_PATH = "lotofacil_index.npy"  # Espaço C(25,15) pré-computado (--build-index)
+# Fonte dos históricos (LOTERIAS_URL_BASE aponta para um espelho/servidor local)
+URL_BASE = os.environ.get("LOTERIAS_URL_BASE", "https://raw.githubusercontent.com/guilhermeasn/loteria.json/master/data/")
+ETL_TIMEOUT = 30  # segundos (conexão e leitura); 'timeout' na config da loteria sobrepõe
+ETL_TENTATIVAS = 3  # Falhas de rede/5xx: novas tentativas com backoff exponencial
+ETL_BACKOFF = 0.5  # segundos antes da 2ª tentativa (dobra a cada uma)
+
+# Geração híbrida em paralelo: jogos por shard e processos do pool compartilhado
+# (core/pool.py, também usado pela simulação; HYBRID_WORKERS no ambiente)
+HYBRID_SHARD_JOGOS = 50
+HYBRID_WORKERS = int(os.environ.get("HYBRID_WORKERS", os.cpu_count() or 1))
+# Jogos por rodada a partir dos quais os shards vão para o pool: abaixo disso a
+# partida dos processos (spawn, ~1.5 s) custa mais que gerar tudo no processo.
+# Só a Lotofácil (~10 ms/jogo com filtros + AI) chega a compensar.
+HYBRID_POOL_MIN_JOGOS = {'lotofacil': 200, 'lotomania': 20000, 'megasena': 20000, 'diadesorte': 20000}
+
+# Simulação Monte Carlo de prêmios: sorteios por padrão, por bloco vetorizado e por tarefa do pool
+SIM_SORTEIOS = 1_000_000
+SIM_BLOCO = 50_000
+SIM_TAREFA = 500_000
+SIM_BLOCO_CELULAS = 2_000_000  # jogos x sorteios por bloco do simulador de prêmios (limita a memória)
+
+# Backtest walk-forward: concursos por tarefa do pool (o LotteryAI é treinado uma
+# vez por tarefa, só com os concursos anteriores ao primeiro dela) e histórico
+# mínimo antes do primeiro concurso testado
+WALKFORWARD_BLOCO = 50
+WALKFORWARD_MIN_HISTORICO = 100
+
+# Janelas de recência (últimos N concursos) mantidas na tabela de estatísticas
+STATS_JANELAS = [10, 30, 100, 500]
+
+# Pesos do score (V2.0): 40% Freq Global + 30% Atraso + 30% Recência (últimos 30)
+# Features: 'frequencia', 'atraso' e 'recencia_<janela>' para cada janela calculada
+SCORE_PESOS = {
+    'frequencia': 0.4,
+    'atraso': 0.3,
+    'recencia_30': 0.3
+}
 
 CONFIG_LOTERIAS = {
     "megasena": {
@@ -9,6 +49,7 @@ CONFIG_LOTERIAS = {
         "preco": 6.00, 
         "total_nums": 60, 
         "escolhe": 6,
+        "sorteia": 6,  # Dezenas sorteadas por concurso
         "orcamento_alvo": 12.00 # ~2 jogos
     },
     "lotofacil": {
@@ -16,6 +57,7 @@ CONFIG_LOTERIAS = {
         "preco": 3.50, 
         "total_nums": 25, 
         "escolhe": 15,
+        "sorteia": 15,
         "orcamento_alvo": 35.00, # ~10 jogos
         "fixed_core": 4,
         "variable_selection": 11
@@ -25,6 +67,7 @@ CONFIG_LOTERIAS = {
         "preco": 3.00, 
         "total_nums": 100, 
         "escolhe": 50,
+        "sorteia": 20,  # Aposta 50, sorteio 20
         "orcamento_alvo": 15.00 # ~5 jogos
     },
     "diadesorte": {
@@ -32,6 +75,27 @@ CONFIG_LOTERIAS = {
         "preco": 2.50, 
         "total_nums": 31, 
         "escolhe": 7,
+        "sorteia": 7,
         "orcamento_alvo": 35.00 # ~14 jogos
     }
 }
+
+# --- FILTROS (V6.1) ---
+# Estágios declarativos por loteria: feature + faixa aceita [min, max].
+# 'repetidas' (dezenas repetidas do último concurso) só roda quando há histórico.
+# A ordem abaixo é só a inicial: o FilterPipeline se reordena em tempo de
+# execução (mais baratos e mais seletivos primeiro).
+FILTROS_LOTERIAS = {
+    "lotofacil": [
+        {"nome": "soma", "feature": "soma", "min": 160, "max": 230},       # Normal: 180-210
+        {"nome": "primos", "feature": "primos", "min": 3, "max": 8},       # Normal: 4-6
+        {"nome": "fibonacci", "feature": "fibonacci", "min": 2, "max": 7}, # Normal: 3-5
+        {"nome": "sequencia", "feature": "sequencia", "max": 6},           # Sequência de 7 é muito rara
+        {"nome": "repetidas", "feature": "repetidas", "min": 7, "max": 11} # Normal: 8-10
+    ],
+    "megasena": [
+        {"nome": "paridade", "feature": "pares", "min": 2, "max": 4}       # Ideal 3P/3I, 4P/2I ou 2P/4I
+    ],
+    "lotomania": [],
+    "diadesorte": []
+}
@@ -1,4 +1,7 @@
+import numpy as np
 from typing import List, Set
+from .config import CONFIG_LOTERIAS
+from .bitmask import encode_game, games_to_matrix, matrix_to_games
 
 class CoverageEngine:
     def __init__(self, min_distance: int = 4, game_type: str = 'lotofacil'):
@@ -7,9 +10,12 @@ class CoverageEngine:
         game_type: 'lotofacil', 'lotomania', etc.
         
         V6 Hybrid: Ajuste específico para Lotomania
+        V6.1: O portfolio aceito é mantido como matriz 0/1; a checagem contra
+        todos os jogos é um único produto matricial.
         """
         self.base_min_distance = min_distance
         self.game_type = game_type
+        self.total_nums = CONFIG_LOTERIAS.get(game_type, {}).get('total_nums', 100)
         
         # Ajuste específico para Lotomania (permitir clusters mais densos)
         if game_type == 'lotomania':
@@ -17,23 +23,81 @@ class CoverageEngine:
             self.min_distance = max(6, min_distance // 2)
         else:
             self.min_distance = min_distance
+        
+        # Cache matricial do portfolio (sincronizado com a lista do chamador)
+        self._portfolio_ref = None
+        self._matrix = np.zeros((0, self.total_nums), dtype=np.float32)
+        self._size = 0
+
+    @staticmethod
+    def mask_distance(mask_a: int, mask_b: int) -> int:
+        """Distância entre dois jogos já codificados em bitmask: popcount(A & ~B)."""
+        return (mask_a & ~mask_b).bit_count()
 
     def calculate_distance(self, game_a: List[int], game_b: List[int]) -> int:
         """Calcula quantos números de A não estão em B."""
-        set_a = set(game_a)
-        set_b = set(game_b)
-        
         # Hamming Distance (assimétrica para conjuntos de mesmo tamanho)
-        diff = len(set_a.difference(set_b))
-        return diff
+        return self.mask_distance(encode_game(game_a), encode_game(game_b))
+
+    def _sync(self, portfolio: List[List[int]]) -> np.ndarray:
+        """
+        Retorna a matriz (P x total_nums) do portfolio. Se é a mesma lista da
+        chamada anterior e ela só cresceu, codifica apenas os jogos novos.
+        """
+        if portfolio is not self._portfolio_ref or len(portfolio) < self._size:
+            self._portfolio_ref = portfolio
+            self._size = 0
+        
+        novos = portfolio[self._size:]
+        if novos:
+            needed = self._size + len(novos)
+            if needed > len(self._matrix):
+                grown = np.zeros((max(needed, 2 * len(self._matrix), 16), self.total_nums), dtype=np.float32)
+                grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+            self._matrix[self._size:needed] = games_to_matrix(novos, self.total_nums)
+            self._size = needed
+        return self._matrix[:self._size]
+
+    def distances(self, candidates, portfolio: List[List[int]]) -> np.ndarray:
+        """Matriz (C x P) de distâncias |candidato - jogo| contra todo o portfolio."""
+        cand = np.asarray(candidates, dtype=np.float32) if isinstance(candidates, np.ndarray) \
+            else games_to_matrix(candidates, self.total_nums).astype(np.float32)
+        port = self._sync(portfolio)
+        return cand.sum(axis=1, keepdims=True) - cand @ port.T
 
     def is_diverse(self, new_game: List[int], portfolio: List[List[int]]) -> bool:
         """Retorna True se o jogo tem a distância mínima de TODOS os jogos do portfolio."""
         if not portfolio:
             return True
-            
-        for existing_game in portfolio:
-            dist = self.calculate_distance(new_game, existing_game)
-            if dist < self.min_distance:
-                return False  # Rejeitado: muito parecido com um jogo existente
-        return True
+        
+        dist = self.distances([new_game], portfolio)[0]
+        return bool((dist >= self.min_distance).all())  # Rejeitado se muito parecido com algum jogo
+
+    def filter_diverse(self, candidates, portfolio: List[List[int]], limit: int = None) -> List[List[int]]:
+        """
+        Versão em lote do is_diverse. Recebe um bloco de candidatos (lista de jogos
+        ou matriz 0/1) e retorna, em ordem, os que podem entrar no portfolio:
+        cada aceito respeita a distância mínima do portfolio e dos aceitos antes
+        dele no mesmo bloco. Não altera o portfolio; limit corta no N-ésimo aceito.
+        """
+        cand = candidates if isinstance(candidates, np.ndarray) else games_to_matrix(candidates, self.total_nums)
+        cand = cand.astype(np.float32)
+        if len(cand) == 0:
+            return []
+        
+        ok = (self.distances(cand, portfolio) >= self.min_distance).all(axis=1)
+        # Distâncias dentro do bloco: d[i, j] = |cand_i - cand_j|
+        intra = cand.sum(axis=1, keepdims=True) - cand @ cand.T
+        
+        # Cada aceito bloqueia os candidatos muito parecidos com ele
+        bloqueado = ~ok
+        aceitos = []
+        for i in range(len(cand)):
+            if bloqueado[i]:
+                continue
+            aceitos.append(i)
+            if limit is not None and len(aceitos) >= limit:
+                break
+            bloqueado |= intra[:, i] < self.min_distance
+        return matrix_to_games(cand[aceitos].astype(np.uint8))
@@ -0,0 +1,116 @@
+"""
+Camada de Acesso ao Banco (V6.1)
+Conexões de leitura reaproveitadas por thread (uma por thread/processo), abertas
+em modo read-only via URI e com pragmas de leitura (mmap, cache de páginas).
+O sqlite3 mantém um cache de statements por conexão: as consultas fixas do
+caminho quente são preparadas uma única vez.
+
+Modo memória (DB_MEMORIA=1): na inicialização a base inteira é copiada para um
+banco em memória compartilhado (API de backup) e as leituras do processo da API
+(rotas síncronas: estatísticas, histórico, auditoria, versão dos dados) não
+tocam o disco. Os workers dos jobs de geração são outros processos (spawn) e
+leem do arquivo; lá o caminho pesado já é servido pelo cache de snapshots do
+worker, que só relê a base quando a versão dos dados muda. A escrita (ETL)
+continua usando etl.get_db().
+"""
+
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+from .config import DB_PATH
+
+# Pragmas de leitura: 256 MB de mmap (compartilhado pelo SO) e ~8 MB de cache de
+# páginas por conexão (há uma por thread do threadpool da API)
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KB = 8 * 1024
+CACHED_STATEMENTS = 256
+
+MEMORIA_URI = "file:loterias_memoria?mode=memory&cache=shared"
+
+_local = threading.local()
+_conexoes: List[sqlite3.Connection] = []
+_lock = threading.Lock()
+_memoria: Optional[sqlite3.Connection] = None  # Mantém o banco em memória vivo
+_memoria_pid = None
+
+def modo_memoria() -> bool:
+    # A cópia em memória é só do processo que a carregou (workers dos jobs leem do disco)
+    return _memoria is not None and _memoria_pid == os.getpid()
+
+def db_disponivel() -> bool:
+    return modo_memoria() or os.path.isfile(DB_PATH)
+
+def _abrir_leitura() -> sqlite3.Connection:
+    if modo_memoria():
+        conn = sqlite3.connect(MEMORIA_URI, uri=True, check_same_thread=False,
+                               cached_statements=CACHED_STATEMENTS)
+    else:
+        caminho = os.path.abspath(DB_PATH)
+        # Sem immutable=1: o ETL pode estar gravando a base e os leitores precisam ver os commits
+        conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, check_same_thread=False,
+                               cached_statements=CACHED_STATEMENTS)
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA query_only = 1")
+    return conn
+
+def conexao_leitura() -> sqlite3.Connection:
+    """
+    Conexão read-only da thread atual (criada na primeira chamada).
+    Não deve ser fechada pelo chamador.
+    """
+    conn = getattr(_local, 'conn', None)
+    # Conexões não sobrevivem a fork: cada processo abre as suas
+    if conn is None or _local.pid != os.getpid():
+        conn = _abrir_leitura()
+        _local.conn = conn
+        _local.pid = os.getpid()
+        with _lock:
+            _conexoes.append(conn)
+    return conn
+
+def fechar_conexoes():
+    """Fecha as conexões de leitura de todas as threads (reabertas sob demanda)."""
+    global _local
+    with _lock:
+        for conn in _conexoes:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        _conexoes.clear()
+        _local = threading.local()
+
+def carregar_em_memoria(path: str = DB_PATH) -> bool:
+    """
+    Copia a base para o banco em memória compartilhado (API de backup) e passa
+    a servir as leituras a partir dele. Chamar de novo recarrega a cópia.
+    """
+    global _memoria, _memoria_pid
+    if not os.path.isfile(path):
+        return False
+    origem = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    try:
+        destino = sqlite3.connect(MEMORIA_URI, uri=True, check_same_thread=False)
+        origem.backup(destino)
+    finally:
+        origem.close()
+
+    fechar_conexoes()
+    with _lock:
+        anterior, _memoria = _memoria, destino
+        _memoria_pid = os.getpid()
+    if anterior is not None:
+        anterior.close()
+    return True
+
+def descarregar_memoria():
+    """Volta a ler do arquivo em disco."""
+    global _memoria
+    fechar_conexoes()
+    with _lock:
+        anterior, _memoria = _memoria, None
+    if anterior is not None:
+        anterior.close()
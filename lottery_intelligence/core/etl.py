@@ -1,9 +1,18 @@
 
+import codecs
+import hashlib
 import sqlite3
 import requests
 import json
-import os
-from .config import CONFIG_LOTERIAS, DB_PATH
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .config import CONFIG_LOTERIAS, DB_PATH, STATS_JANELAS, ETL_TIMEOUT, ETL_TENTATIVAS, ETL_BACKOFF
+from .bitmask import encode_game, decode_mask, mask_to_blob, blob_to_mask, blobs_to_masks
+from .stats import StatsKernel
+from .db import conexao_leitura
 
 def get_db():
     conn = sqlite3.connect(DB_PATH)
@@ -11,6 +20,9 @@ def get_db():
 
 def setup_db():
     conn = get_db()
+    # Journal de rollback (não WAL): a API monta só o arquivo .db read-only, sem
+    # enxergar -wal/-shm; DELETE também converte de volta bases que ficaram em WAL
+    conn.execute("PRAGMA journal_mode=DELETE")
     cursor = conn.cursor()
     
     # Tabela simples para cada loteria
@@ -19,65 +31,576 @@ def setup_db():
             CREATE TABLE IF NOT EXISTS {loteria} (
                 concurso INTEGER PRIMARY KEY,
                 data TEXT,
-                dezenas TEXT
+                dezenas TEXT,
+                mascara BLOB
             )
         ''')
+        # Bases antigas (V6.0) não têm a coluna de bitmask
+        colunas = [row[1] for row in cursor.execute(f"PRAGMA table_info({loteria})")]
+        if 'mascara' not in colunas:
+            cursor.execute(f"ALTER TABLE {loteria} ADD COLUMN mascara BLOB")
+    
+    # Estatísticas persistidas (mantidas incrementalmente pelo ETL)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS estatisticas (
+            loteria TEXT,
+            numero INTEGER,
+            frequencia INTEGER,
+            ultimo_concurso INTEGER,
+            ultima_posicao INTEGER,
+            PRIMARY KEY (loteria, numero)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS estatisticas_janelas (
+            loteria TEXT,
+            janela INTEGER,
+            numero INTEGER,
+            contagem INTEGER,
+            PRIMARY KEY (loteria, janela, numero)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS estatisticas_meta (
+            loteria TEXT PRIMARY KEY,
+            total_sorteios INTEGER,
+            ultimo_concurso INTEGER,
+            janelas TEXT,
+            revisao INTEGER DEFAULT 0
+        )
+    ''')
+    # Revisão dos dados da loteria (chave do cache de snapshots); bases antigas não têm
+    colunas = [row[1] for row in cursor.execute("PRAGMA table_info(estatisticas_meta)")]
+    if 'revisao' not in colunas:
+        cursor.execute("ALTER TABLE estatisticas_meta ADD COLUMN revisao INTEGER DEFAULT 0")
+    # Estado HTTP de cada fonte: requisições condicionais e hash do último payload
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fontes (
+            loteria TEXT PRIMARY KEY,
+            url TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            hash TEXT,
+            atualizado_em TEXT
+        )
+    ''')
     conn.commit()
     return conn
 
-# --- ETL ---
-def baixar_e_salvar(loteria, conn):
-    print(f"[{loteria.upper()}] Baixando dados...")
-    url = CONFIG_LOTERIAS[loteria]["url"]
+def backfill_mascaras(loteria, conn):
+    """Preenche a coluna mascara dos concursos gravados antes do bitmask."""
+    cursor = conn.cursor()
+    rows = cursor.execute(f"SELECT concurso, dezenas FROM {loteria} WHERE mascara IS NULL").fetchall()
+    updates = []
+    for concurso, dezenas in rows:
+        try:
+            updates.append((mask_to_blob(encode_game(json.loads(dezenas))), concurso))
+        except Exception:
+            continue
+    if updates:
+        cursor.executemany(f"UPDATE {loteria} SET mascara = ? WHERE concurso = ?", updates)
+        conn.commit()
+    return len(updates)
+
+def carregar_mascaras(loteria, conn=None, last_n=0):
+    """
+    Carrega o histórico como bitmasks, em ordem crescente de concurso.
+    last_n > 0 limita aos últimos N concursos.
+
+    Returns:
+        Tuple[concursos (N,), mascaras (N, MASK_WORDS) uint64]
+    """
+    if conn is None:
+        conn = conexao_leitura()
+    colunas = [row[1] for row in conn.execute(f"PRAGMA table_info({loteria})")]
+    col_mascara = 'mascara' if 'mascara' in colunas else 'NULL'
+    query = f"SELECT concurso, {col_mascara}, dezenas FROM {loteria} ORDER BY concurso DESC"
+    if last_n > 0:
+        query += f" LIMIT {int(last_n)}"
+    rows = conn.execute(query).fetchall()
+
+    rows.reverse()
+    concursos = []
+    blobs = []
+    for concurso, mascara, dezenas in rows:
+        if mascara is None:
+            # Base ainda não migrada (ex: montada read-only): decodifica o JSON
+            try:
+                mascara = mask_to_blob(encode_game(json.loads(dezenas)))
+            except Exception:
+                continue
+        concursos.append(concurso)
+        blobs.append(mascara)
+    return np.array(concursos, dtype=np.int64), blobs_to_masks(blobs)
+
+# --- ESTATÍSTICAS PERSISTIDAS ---
+def _salvar_estatisticas(loteria, conn, total, ultimo_concurso, freq, ult_conc, ult_pos, janelas):
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT OR REPLACE INTO estatisticas (loteria, numero, frequencia, ultimo_concurso, ultima_posicao) VALUES (?, ?, ?, ?, ?)",
+        [(loteria, n + 1, int(freq[n]), int(ult_conc[n]), int(ult_pos[n])) for n in range(len(freq))]
+    )
+    cursor.execute("DELETE FROM estatisticas_janelas WHERE loteria = ?", (loteria,))
+    cursor.executemany(
+        "INSERT INTO estatisticas_janelas (loteria, janela, numero, contagem) VALUES (?, ?, ?, ?)",
+        [(loteria, int(w), n + 1, int(c)) for w, counts in janelas.items() for n, c in enumerate(counts)]
+    )
+    cursor.execute(
+        "INSERT OR REPLACE INTO estatisticas_meta (loteria, total_sorteios, ultimo_concurso, janelas, revisao) "
+        "VALUES (?, ?, ?, ?, COALESCE((SELECT revisao FROM estatisticas_meta WHERE loteria = ?), 0) + 1)",
+        (loteria, int(total), int(ultimo_concurso), json.dumps(sorted(janelas)), loteria)
+    )
+    conn.commit()
+
+def reconstruir_estatisticas(loteria, conn):
+    """Recalcula a tabela de estatísticas a partir de todo o histórico."""
+    concursos, mascaras = carregar_mascaras(loteria, conn)
+    kernel = StatsKernel.from_masks(mascaras, loteria)
+    freq, _, janelas = kernel.counts()
+    ult_pos = kernel.ultima_posicao[-1]
+    ult_conc = np.where(ult_pos >= 0, concursos[np.maximum(ult_pos, 0)], 0) if len(concursos) else np.zeros_like(freq)
+    ultimo = int(concursos[-1]) if len(concursos) else 0
+    _salvar_estatisticas(loteria, conn, len(concursos), ultimo, freq, ult_conc, ult_pos, janelas)
+
+def atualizar_estatisticas(loteria, conn, novos):
+    """
+    Aplica concursos novos (anexados ao fim do histórico) sobre a tabela de
+    estatísticas, sem reler o histórico. Custo O(novos x dezenas + total_nums).
+    novos: lista de (concurso, mascara_int) em ordem crescente.
+    """
+    total_nums = CONFIG_LOTERIAS[loteria]['total_nums']
+    meta = conn.execute(
+        "SELECT total_sorteios, ultimo_concurso, janelas FROM estatisticas_meta WHERE loteria = ?", (loteria,)
+    ).fetchone()
+    if meta is None or json.loads(meta[2]) != sorted(STATS_JANELAS):
+        reconstruir_estatisticas(loteria, conn)
+        return
+    total, ultimo = meta[0], meta[1]
+    # Tabela defasada (ex: ETL interrompido depois de gravar alguns lotes): não
+    # há base para o incremento. Conferido mesmo sem concursos novos.
+    contagem = conn.execute(f"SELECT COUNT(*) FROM {loteria}").fetchone()[0]
+    if contagem != total + len(novos):
+        reconstruir_estatisticas(loteria, conn)
+        return
+    if not novos:
+        return
+    anterior = conn.execute(f"SELECT MAX(concurso) FROM {loteria} WHERE concurso < ?", (novos[0][0],)).fetchone()[0]
+    if (anterior or 0) != ultimo:
+        reconstruir_estatisticas(loteria, conn)
+        return
+    
+    freq = np.zeros(total_nums, dtype=np.int64)
+    ult_conc = np.zeros(total_nums, dtype=np.int64)
+    ult_pos = np.full(total_nums, -1, dtype=np.int64)
+    for numero, f, uc, up in conn.execute(
+        "SELECT numero, frequencia, ultimo_concurso, ultima_posicao FROM estatisticas WHERE loteria = ?", (loteria,)
+    ):
+        freq[numero - 1], ult_conc[numero - 1], ult_pos[numero - 1] = f, uc, up
+    janelas = {w: np.zeros(total_nums, dtype=np.int64) for w in STATS_JANELAS}
+    for janela, numero, contagem in conn.execute(
+        "SELECT janela, numero, contagem FROM estatisticas_janelas WHERE loteria = ?", (loteria,)
+    ):
+        janelas[janela][numero - 1] = contagem
+    
+    # Cauda do histórico anterior: os concursos que saem das janelas
+    max_janela = max(STATS_JANELAS, default=0)
+    cauda = conn.execute(
+        f"SELECT mascara FROM {loteria} WHERE concurso <= ? ORDER BY concurso DESC LIMIT ?", (ultimo, max_janela)
+    ).fetchall()
+    sequencia = [blob_to_mask(row[0]) for row in reversed(cauda)]
+    offset = len(sequencia)
+    sequencia.extend(mascara for _, mascara in novos)
+    
+    for j, (concurso, mascara) in enumerate(novos):
+        posicao = total + j
+        for n in decode_mask(mascara):
+            freq[n - 1] += 1
+            ult_conc[n - 1] = concurso
+            ult_pos[n - 1] = posicao
+        for w, counts in janelas.items():
+            for n in decode_mask(mascara):
+                counts[n - 1] += 1
+            if posicao - w >= 0:
+                for n in decode_mask(sequencia[offset + j - w]):
+                    counts[n - 1] -= 1
+    
+    _salvar_estatisticas(loteria, conn, total + len(novos), novos[-1][0], freq, ult_conc, ult_pos, janelas)
+
+def carregar_estatisticas(loteria, conn=None):
+    """
+    Lê a tabela de estatísticas em O(total_nums).
+    Retorna None se a tabela não existir ou estiver defasada em relação ao histórico.
+    """
+    total_nums = CONFIG_LOTERIAS[loteria]['total_nums']
+    if conn is None:
+        conn = conexao_leitura()
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        
-        cursor = conn.cursor()
-        registros = 0
+        meta = conn.execute(
+            "SELECT total_sorteios, ultimo_concurso, janelas FROM estatisticas_meta WHERE loteria = ?", (loteria,)
+        ).fetchone()
+        max_concurso = conn.execute(f"SELECT MAX(concurso) FROM {loteria}").fetchone()[0]
+        if meta is None or meta[1] != max_concurso or json.loads(meta[2]) != sorted(STATS_JANELAS):
+            return None
         
-        # O formato do JSON pode variar
-        items = []
-        if isinstance(data, dict):
-            for k, v in data.items():
-                items.append({'concurso': k, 'dezenas': v})
-        elif isinstance(data, list):
-            items = data
-            
-        for item in items:
-            concurso = item.get('Concurso') or item.get('concurso')
-            dezenas = item.get('Dezenas') or item.get('dezenas')
-            data_sorteio = item.get('Data') or item.get('data') or ""
-            
-            if not concurso or not dezenas: continue
-            
+        total = meta[0]
+        freq = np.zeros(total_nums, dtype=np.int64)
+        atraso = np.full(total_nums, total, dtype=np.int64)
+        for numero, f, up in conn.execute(
+            "SELECT numero, frequencia, ultima_posicao FROM estatisticas WHERE loteria = ?", (loteria,)
+        ):
+            freq[numero - 1] = f
+            atraso[numero - 1] = total - 1 - up if up >= 0 else total
+        janelas = {w: np.zeros(total_nums, dtype=np.int64) for w in STATS_JANELAS}
+        for janela, numero, contagem in conn.execute(
+            "SELECT janela, numero, contagem FROM estatisticas_janelas WHERE loteria = ?", (loteria,)
+        ):
+            janelas[janela][numero - 1] = contagem
+    except sqlite3.OperationalError:
+        # Base sem as tabelas de estatísticas (ex: montada read-only)
+        return None
+    
+    return {'total_sorteios': total, 'frequencia': freq, 'atraso': atraso, 'janelas': janelas}
+
+# --- ETL ---
+# Ingestão em lote: o JSON é lido em blocos e decodificado item a item, e as
+# linhas validadas vão para o banco via executemany, uma transação curta por
+# lote (o lock de escrita não fica preso enquanto a rede entrega o payload).
+CHUNK_BYTES = 64 * 1024
+LOTE_INGESTAO = 1000
+_ESPACOS = ' \t\n\r'
+
+def _iterar_json(blocos):
+    """
+    Parser incremental do payload: aceita um objeto {concurso: dezenas} ou uma
+    lista de objetos e devolve cada item como dict assim que ele está completo
+    no buffer (o documento inteiro nunca é carregado de uma vez).
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    blocos = iter(blocos)
+    buffer = ''
+    pos = 0
+    fim = False
+
+    def ler():
+        nonlocal buffer, pos, fim
+        bloco = next(blocos, None)
+        if bloco is None:
+            fim = True
+            buffer = buffer[pos:] + utf8.decode(b'', final=True)
+        else:
+            buffer = buffer[pos:] + (utf8.decode(bloco) if isinstance(bloco, bytes) else bloco)
+        pos = 0
+
+    def proximo_char():
+        # Primeiro caractere significativo (sem consumir), '' no fim do documento
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _ESPACOS:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if fim:
+                return ''
+            ler()
+
+    def valor():
+        # Decodifica o próximo valor; só aceita quando o delimitador seguinte já
+        # está no buffer (um número cortado no fim do bloco pareceria completo)
+        nonlocal pos
+        proximo_char()
+        while True:
             try:
-                dezenas_clean = []
-                for d in dezenas:
-                    try:
-                        val = int(d)
-                        dezenas_clean.append(val)
-                    except:
-                        pass
-                
-                min_nums = CONFIG_LOTERIAS[loteria]['escolhe']
-                if len(dezenas_clean) < min_nums:
-                    continue
-                    
-                dezenas_json = json.dumps(sorted(dezenas_clean))
-                
-                cursor.execute(f'''
-                    INSERT OR REPLACE INTO {loteria} (concurso, data, dezenas) 
-                    VALUES (?, ?, ?)
-                ''', (int(concurso), data_sorteio, dezenas_json))
-                registros += 1
-            except Exception as ex:
+                obj, final = decoder.raw_decode(buffer, pos)
+                while final < len(buffer) and buffer[final] in _ESPACOS:
+                    final += 1
+                if (final < len(buffer) and buffer[final] in ',:]}') or fim:
+                    pos = final
+                    return obj
+            except json.JSONDecodeError:
+                if fim:
+                    raise
+            ler()
+
+    def esperar(caractere):
+        nonlocal pos
+        if proximo_char() != caractere:
+            raise json.JSONDecodeError(f"Esperado '{caractere}'", buffer, pos)
+        pos += 1
+
+    abertura = proximo_char()
+    if abertura not in ('{', '['):
+        raise json.JSONDecodeError("Esperado objeto ou lista", buffer, pos)
+    fechamento = '}' if abertura == '{' else ']'
+    pos += 1
+    if proximo_char() == fechamento:
+        return
+    while True:
+        if abertura == '{':
+            chave = valor()
+            esperar(':')
+            yield {'concurso': chave, 'dezenas': valor()}
+        else:
+            yield valor()
+        if proximo_char() == fechamento:
+            return
+        esperar(',')
+
+def _normalizar_sorteio(item, total_nums, sorteia, dezena_zero=0):
+    """
+    (concurso, data, dezenas_json, mascara_int) ou None se o item for inválido.
+    dezena_zero: valor da dezena "00" (100 na Lotomania; 0 = fora da faixa).
+    """
+    if not isinstance(item, dict):
+        return None
+    concurso = item.get('Concurso') or item.get('concurso')
+    dezenas = item.get('Dezenas') or item.get('dezenas')
+    data_sorteio = item.get('Data') or item.get('data') or ""
+    if not concurso or not isinstance(dezenas, list):
+        return None
+    try:
+        concurso = int(concurso)
+        dezenas_clean = sorted({int(d) or dezena_zero for d in dezenas})
+    except (TypeError, ValueError):
+        return None
+    if concurso <= 0 or len(dezenas_clean) != sorteia:
+        return None
+    if dezenas_clean[0] < 1 or dezenas_clean[-1] > total_nums:
+        return None
+    return concurso, str(data_sorteio), json.dumps(dezenas_clean), encode_game(dezenas_clean)
+
+def _gravar_lote(loteria, conn, sql, lote):
+    """Grava um lote numa transação curta e avança a revisão dos dados da loteria."""
+    with conn:
+        conn.executemany(sql, lote)
+        conn.execute("UPDATE estatisticas_meta SET revisao = revisao + 1 WHERE loteria = ?", (loteria,))
+
+def ingerir_sorteios(loteria, conn, itens, apos_concurso=0):
+    """
+    Valida e grava os sorteios em lotes: o parse e a validação rodam fora de
+    transação, e cada lote de LOTE_INGESTAO linhas é gravado numa transação
+    própria (executemany). Linhas idênticas às já gravadas não são reescritas.
+    Se o stream falhar no meio, os lotes já gravados ficam; as estatísticas
+    não são tocadas e a próxima sincronização as reconstrói.
+    apos_concurso > 0: sincronização delta, concursos <= apos_concurso são
+    ignorados (contados em 'ignorados') sem comparar com o banco.
+
+    Returns:
+        (contagens, novos, reconstruir): contagens de inseridos/atualizados/
+        inalterados/rejeitados/ignorados, concursos anexados ao fim do histórico
+        como (concurso, mascara_int) e se as estatísticas precisam ser reconstruídas.
+    """
+    cfg = CONFIG_LOTERIAS[loteria]
+    total_nums, sorteia = cfg['total_nums'], cfg['sorteia']
+    # Lotomania publica a dezena 100 como "00" (mesma regra do auditor)
+    dezena_zero = 100 if loteria == 'lotomania' else 0
+    cursor = conn.cursor()
+    contagens = {'inseridos': 0, 'atualizados': 0, 'inalterados': 0, 'rejeitados': 0, 'ignorados': 0}
+
+    # Estado anterior: decide entre atualização incremental e reconstrução
+    existentes = {concurso: (dezenas, data) for concurso, dezenas, data in cursor.execute(
+        f"SELECT concurso, dezenas, data FROM {loteria} WHERE concurso > ?", (apos_concurso,))}
+    max_anterior = max(existentes, default=apos_concurso)
+    novos = []
+    reconstruir = False
+    sql = f"INSERT OR REPLACE INTO {loteria} (concurso, data, dezenas, mascara) VALUES (?, ?, ?, ?)"
+
+    lote = []
+    for item in itens:
+        linha = _normalizar_sorteio(item, total_nums, sorteia, dezena_zero)
+        if linha is None:
+            contagens['rejeitados'] += 1
+            continue
+        concurso, data_sorteio, dezenas_json, mascara_int = linha
+        if concurso <= apos_concurso:
+            contagens['ignorados'] += 1
+            continue
+
+        anterior = existentes.get(concurso)
+        if anterior is not None:
+            if anterior == (dezenas_json, data_sorteio):
+                contagens['inalterados'] += 1
                 continue
-                
-        conn.commit()
-        print(f"[{loteria.upper()}] {registros} registros salvos/atualizados.")
+            contagens['atualizados'] += 1
+            reconstruir |= anterior[0] != dezenas_json
+        else:
+            contagens['inseridos'] += 1
+            if concurso < max_anterior:
+                reconstruir = True
+            else:
+                novos.append((concurso, mascara_int))
+        existentes[concurso] = (dezenas_json, data_sorteio)
+
+        lote.append((concurso, data_sorteio, dezenas_json, mask_to_blob(mascara_int)))
+        if len(lote) >= LOTE_INGESTAO:
+            _gravar_lote(loteria, conn, sql, lote)
+            lote.clear()
+    if lote:
+        _gravar_lote(loteria, conn, sql, lote)
+
+    novos.sort()
+    return contagens, novos, reconstruir
+
+def _carregar_fonte(loteria, conn):
+    row = conn.execute(
+        "SELECT url, etag, last_modified, hash FROM fontes WHERE loteria = ?", (loteria,)
+    ).fetchone()
+    return dict(zip(('url', 'etag', 'last_modified', 'hash'), row)) if row else None
+
+def _salvar_fonte(loteria, conn, url, etag, last_modified, hash_payload):
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO fontes (loteria, url, etag, last_modified, hash, atualizado_em) "
+            "VALUES (?, ?, ?, ?, ?, datetime('now'))",
+            (loteria, url, etag, last_modified, hash_payload)
+        )
+
+def _erro_transitorio(e):
+    if isinstance(e, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)):
         return True
+    resposta = getattr(e, 'response', None)
+    return resposta is not None and (resposta.status_code >= 500 or resposta.status_code == 429)
+
+def _abrir_payload(url, headers, timeout):
+    """
+    GET em stream com novas tentativas (backoff exponencial) em falhas de rede e
+    5xx até a resposta chegar; o corpo é lido depois, por quem chamou.
+    Returns: None em 304, senão a resposta (fechar com `with`).
+    """
+    for tentativa in range(ETL_TENTATIVAS):
+        response = None
+        try:
+            response = requests.get(url, headers=headers, stream=True, timeout=timeout)
+            if response.status_code == 304:
+                response.close()
+                return None
+            response.raise_for_status()
+            return response
+        except requests.RequestException as e:
+            if response is not None:
+                response.close()
+            if tentativa + 1 >= ETL_TENTATIVAS or not _erro_transitorio(e):
+                raise
+            time.sleep(ETL_BACKOFF * 2 ** tentativa)
+
+def _baixar_em_arquivo(response, arquivo):
+    """
+    Copia o corpo da resposta para `arquivo` em blocos (o payload não fica
+    inteiro em memória) e devolve o sha256 dos bytes crus.
+    """
+    hasher = hashlib.sha256()
+    for bloco in response.iter_content(chunk_size=CHUNK_BYTES):
+        hasher.update(bloco)
+        arquivo.write(bloco)
+    arquivo.seek(0)
+    return hasher.hexdigest()
+
+def baixar_e_salvar(loteria, conn, completo=False):
+    """
+    Sincroniza o histórico da loteria com a fonte.
+
+    Requisição condicional (ETag/Last-Modified): 304 encerra sem ler o corpo.
+    O corpo é copiado em blocos para um arquivo temporário e hasheado; payload
+    com o mesmo hash encerra sem parse. Caso contrário o arquivo é parseado em
+    stream e só os concursos acima do maior já gravado são ingeridos.
+    completo=True baixa sem condicionais e compara o histórico inteiro (aplica
+    correções em concursos antigos).
+
+    Returns: dict com as contagens da ingestão e 'fonte' ('nao_modificada',
+    'mesmo_hash' ou 'baixada'), ou None em caso de erro.
+    """
+    print(f"[{loteria.upper()}] Baixando dados...")
+    url = CONFIG_LOTERIAS[loteria]["url"]
+    try:
+        max_concurso = conn.execute(f"SELECT MAX(concurso) FROM {loteria}").fetchone()[0] or 0
+        # Sem histórico gravado o estado da fonte não vale (ex: tabela recriada)
+        fonte = _carregar_fonte(loteria, conn) if max_concurso and not completo else None
+        if fonte is not None and fonte['url'] != url:
+            fonte = None
+
+        headers = {}
+        if fonte is not None:
+            if fonte['etag']:
+                headers['If-None-Match'] = fonte['etag']
+            if fonte['last_modified']:
+                headers['If-Modified-Since'] = fonte['last_modified']
+
+        vazias = {'inseridos': 0, 'atualizados': 0, 'inalterados': 0, 'rejeitados': 0, 'ignorados': 0}
+        response = _abrir_payload(url, headers, CONFIG_LOTERIAS[loteria].get('timeout', ETL_TIMEOUT))
+        if response is None:
+            print(f"[{loteria.upper()}] Fonte não modificada (304).")
+            return dict(vazias, fonte='nao_modificada')
+
+        # O corpo vai para um arquivo temporário enquanto é hasheado: payload
+        # inalterado encerra antes do parse, e o parse lê o arquivo em blocos
+        apos_concurso = 0 if completo else max_concurso
+        with response, tempfile.TemporaryFile() as arquivo:
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+            hash_payload = _baixar_em_arquivo(response, arquivo)
+
+            if fonte is not None and fonte['hash'] == hash_payload:
+                _salvar_fonte(loteria, conn, url, etag, last_modified, hash_payload)
+                print(f"[{loteria.upper()}] Payload inalterado (hash).")
+                return dict(vazias, fonte='mesmo_hash')
+
+            blocos = iter(lambda: arquivo.read(CHUNK_BYTES), b'')
+            contagens, novos, reconstruir = ingerir_sorteios(loteria, conn, _iterar_json(blocos), apos_concurso)
+
+        backfill_mascaras(loteria, conn)
+        if reconstruir:
+            reconstruir_estatisticas(loteria, conn)
+        else:
+            atualizar_estatisticas(loteria, conn, novos)
+        _salvar_fonte(loteria, conn, url, etag, last_modified, hash_payload)
+
+        # Só há snapshot a descartar se o módulo já foi carregado neste processo
+        # (importá-lo aqui puxaria o sklearn para um ETL puro)
+        snapshot = sys.modules.get(f"{__package__}.snapshot")
+        if snapshot is not None:
+            snapshot.invalidar_snapshot(loteria)
+        resumo = (f"{contagens['inseridos']} inseridos, {contagens['atualizados']} atualizados, "
+                  f"{contagens['inalterados']} inalterados, {contagens['rejeitados']} rejeitados")
+        if apos_concurso:
+            resumo += f", {contagens['ignorados']} até o concurso {apos_concurso} (já gravados)"
+        print(f"[{loteria.upper()}] {resumo}.")
+        return dict(contagens, fonte='baixada')
     except Exception as e:
         print(f"[{loteria.upper()}] Erro no ETL: {e}")
-        return False
+        return None
+
+def verificar_escrita(conn):
+    """
+    Falha com sqlite3.OperationalError se a base não aceita escrita (ex: montada
+    read-only no container da API). Regrava o user_version com o mesmo valor.
+    """
+    versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    with conn:
+        conn.execute(f"PRAGMA user_version = {int(versao)}")
+
+def sincronizar(loterias=None, completo=False, max_workers=None):
+    """
+    Sincroniza várias loterias em paralelo (threads: o custo é rede). Cada
+    thread usa a própria conexão de escrita; as transações curtas da ingestão
+    se serializam pelo lock do banco (timeout de ETL_TIMEOUT). O tempo total
+    fica próximo ao da fonte mais lenta.
+
+    Base sem permissão de escrita: sqlite3.OperationalError antes de qualquer download.
+
+    Returns: {loteria: resultado de baixar_e_salvar (None em caso de erro)}
+    """
+    loterias = list(loterias or CONFIG_LOTERIAS)
+    conn = setup_db()
+    try:
+        verificar_escrita(conn)
+    finally:
+        conn.close()
+
+    def tarefa(loteria):
+        conn = sqlite3.connect(DB_PATH, timeout=ETL_TIMEOUT)
+        try:
+            return baixar_e_salvar(loteria, conn, completo=completo)
+        finally:
+            conn.close()
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(1, len(loterias))) as executor:
+        return dict(zip(loterias, executor.map(tarefa, loterias)))
@@ -1,5 +1,12 @@
 
+import threading
+import time
+import numpy as np
 from collections import Counter
+from .config import CONFIG_LOTERIAS, FILTROS_LOTERIAS
+from .bitmask import games_to_matrix
+
+FIBONACCI = {1, 2, 3, 5, 8, 13, 21, 34, 55, 89}
 
 class AdvancedFilters:
     @staticmethod
@@ -15,8 +22,7 @@ class AdvancedFilters:
 
     @staticmethod
     def count_fibonacci(jogo):
-        fibs = {1, 2, 3, 5, 8, 13, 21, 34, 55, 89}
-        return sum(1 for n in jogo if n in fibs)
+        return sum(1 for n in jogo if n in FIBONACCI)
 
     @staticmethod
     def count_consecutive(jogo):
@@ -35,38 +41,226 @@ class AdvancedFilters:
     @staticmethod
     def validar_v3(jogo, loteria, ultimo_resultado=None):
         """
-        Aplica filtros V3 (Soma, Primos, Fibonacci, Repetentes)
+        Aplica os filtros declarados para a loteria (Soma, Primos, Fibonacci, Repetentes...)
         Retorna: True (Aprovado) ou False (Reprovado)
         """
-        # Apenas Lotofácil por enquanto
-        if loteria != 'lotofacil':
+        return FilterPipeline.padrao(loteria).validar(jogo, ultimo_resultado)
+
+    @staticmethod
+    def validar_v3_lote(matriz, loteria, ultimo_resultado=None):
+        """
+        validar_v3 para um bloco inteiro (matriz 0/1 N x total_nums).
+        Retorna: máscara booleana (N,) com os candidatos aprovados.
+        """
+        return FilterPipeline.padrao(loteria).avaliar(matriz, ultimo_resultado)
+
+# --- FEATURES VETORIZADAS (V6.1) ---
+# Cada feature opera sobre uma matriz 0/1 (N x total_nums) e devolve um valor
+# por linha: produto matricial ou varredura de colunas sobre o bloco inteiro.
+
+def _vetor(total_nums, pertence):
+    return np.array([pertence(n) for n in range(1, total_nums + 1)], dtype=np.int16)
+
+def _feature_soma(matriz, ultimo):
+    return matriz @ np.arange(1, matriz.shape[1] + 1, dtype=np.int16)
+
+def _feature_primos(matriz, ultimo):
+    return matriz @ _vetor(matriz.shape[1], AdvancedFilters.is_prime)
+
+def _feature_fibonacci(matriz, ultimo):
+    return matriz @ _vetor(matriz.shape[1], lambda n: n in FIBONACCI)
+
+def _feature_pares(matriz, ultimo):
+    return matriz @ _vetor(matriz.shape[1], lambda n: n % 2 == 0)
+
+def _feature_sequencia(matriz, ultimo):
+    # Maior sequência: comprimento da corrida corrente, coluna a coluna
+    corrida = np.zeros(len(matriz), dtype=np.int16)
+    max_seq = np.zeros(len(matriz), dtype=np.int16)
+    for col in matriz.T:
+        corrida = (corrida + 1) * col
+        np.maximum(max_seq, corrida, out=max_seq)
+    return max_seq
+
+def _feature_repetidas(matriz, ultimo):
+    return matriz @ _vetor(matriz.shape[1], lambda n: n in ultimo)
+
+FEATURES = {
+    'soma': _feature_soma,
+    'primos': _feature_primos,
+    'fibonacci': _feature_fibonacci,
+    'pares': _feature_pares,
+    'sequencia': _feature_sequencia,
+    'repetidas': _feature_repetidas,
+}
+
+# Features que dependem do último concurso (estágio pulado sem histórico)
+FEATURES_COM_ULTIMO = {'repetidas'}
+
+class FilterStage:
+    """Um estágio do pipeline: feature + faixa aceita, com contadores."""
+
+    def __init__(self, nome, feature, min=None, max=None):
+        if feature not in FEATURES:
+            raise ValueError(f"Feature de filtro desconhecida: {feature}")
+        self.nome = nome
+        self.feature = feature
+        self.min = min
+        self.max = max
+        self.avaliados = 0
+        self.rejeitados = 0
+        self.tempo = 0.0
+
+    def aprovar(self, valores):
+        aprovado = np.ones(len(valores), dtype=bool)
+        if self.min is not None:
+            aprovado &= valores >= self.min
+        if self.max is not None:
+            aprovado &= valores <= self.max
+        return aprovado
+
+    def taxa_rejeicao(self):
+        # Suavizada (+1/+2) para não zerar estágios ainda sem amostra
+        return (self.rejeitados + 1) / (self.avaliados + 2)
+
+    def custo(self):
+        """Custo médio por candidato avaliado (segundos)."""
+        return self.tempo / self.avaliados if self.avaliados else 0.0
+
+    def relatorio(self):
+        return {
+            'nome': self.nome,
+            'avaliados': self.avaliados,
+            'rejeitados': self.rejeitados,
+            'taxa_rejeicao': round(self.rejeitados / self.avaliados, 4) if self.avaliados else 0.0,
+            'custo_us': round(self.custo() * 1e6, 3),
+        }
+
+class FilterPipeline:
+    """
+    Pipeline de filtros declarado em FILTROS_LOTERIAS.
+    Cada estágio só avalia os candidatos que sobreviveram aos anteriores. A cada
+    REORDENAR_LINHAS candidatos avaliados o pipeline se reordena por custo / taxa
+    de rejeição (crescente): os estágios baratos e seletivos passam a rodar primeiro.
+    """
+    # Candidatos avaliados entre reordenações (validar() de um jogo não reordena a cada chamada)
+    REORDENAR_LINHAS = 512
+    # Pipeline compartilhado: acima disso os contadores caem pela metade (média
+    # móvel; não crescem sem limite num processo de longa duração)
+    CONTADORES_MAX = 1_000_000
+
+    _padrao = {}
+    _padrao_lock = threading.Lock()
+    _contadores_lock = threading.Lock()  # Atualização dos contadores entre threads (API)
+
+    def __init__(self, loteria, estagios=None, contadores_max=None):
+        self.loteria = loteria
+        if estagios is None:
+            estagios = FILTROS_LOTERIAS.get(loteria, [])
+        self.estagios = [FilterStage(**e) for e in estagios]
+        self.contadores_max = contadores_max
+        self._desde_reordenar = 0
+
+    @classmethod
+    def padrao(cls, loteria):
+        """Pipeline compartilhado do processo (usado pelos atalhos validar_v3*)."""
+        pipeline = cls._padrao.get(loteria)
+        if pipeline is None:
+            with cls._padrao_lock:
+                pipeline = cls._padrao.get(loteria)
+                if pipeline is None:
+                    pipeline = cls._padrao[loteria] = cls(loteria, contadores_max=cls.CONTADORES_MAX)
+        return pipeline
+
+    def avaliar(self, matriz, ultimo_resultado=None):
+        """Retorna a máscara booleana (N,) dos candidatos aprovados."""
+        matriz = np.asarray(matriz, dtype=np.int16)
+        ultimo = set(ultimo_resultado) if ultimo_resultado else None
+        
+        def calcular(feature, vivos):
+            if feature in FEATURES_COM_ULTIMO and not ultimo:
+                return None
+            return FEATURES[feature](matriz[vivos], ultimo)
+        
+        return self.avaliar_features(len(matriz), calcular)
+
+    def avaliar_features(self, n, calcular, medidas=None):
+        """
+        Núcleo do pipeline com features fornecidas pelo chamador (ex: índice
+        pré-computado). calcular(feature, indices) retorna os valores das linhas
+        pedidas, ou None para pular o estágio. Se `medidas` for uma lista, recebe
+        as medidas da avaliação (ver registrar).
+        """
+        aprovados = np.ones(n, dtype=bool)
+        vivos = np.arange(n)
+        registro = []  # (estágio, tempo, avaliados, rejeitados): aplicados de uma vez no fim
+        
+        for estagio in list(self.estagios):
+            if len(vivos) == 0:
+                break
+            inicio = time.perf_counter()
+            valores = calcular(estagio.feature, vivos)
+            if valores is None:
+                continue
+            ok = estagio.aprovar(valores)
+            registro.append((estagio.nome, time.perf_counter() - inicio, len(vivos), int(len(vivos) - ok.sum())))
+            aprovados[vivos[~ok]] = False
+            vivos = vivos[ok]
+        
+        if medidas is not None:
+            medidas.extend(registro)
+        self.registrar(registro, n)
+        return aprovados
+
+    def registrar(self, medidas, n):
+        """
+        Soma aos contadores as medidas (nome, tempo, avaliados, rejeitados) de
+        uma avaliação de n candidatos; também usado para repassar uma avaliação
+        cacheada (ex: índice da Lotofácil) ao relatório de outra requisição.
+        """
+        por_nome = {e.nome: e for e in self.estagios}
+        with self._contadores_lock:
+            for nome, tempo, avaliados, rejeitados in medidas:
+                estagio = por_nome.get(nome)
+                if estagio is None:
+                    continue
+                estagio.tempo += tempo
+                estagio.avaliados += avaliados
+                estagio.rejeitados += rejeitados
+                if self.contadores_max is not None and estagio.avaliados > self.contadores_max:
+                    estagio.tempo /= 2
+                    estagio.avaliados //= 2
+                    estagio.rejeitados //= 2
+            self._desde_reordenar += n
+            reordenar = self._desde_reordenar >= self.REORDENAR_LINHAS
+            if reordenar:
+                self._desde_reordenar = 0
+        if reordenar:
+            self.reordenar()
+
+    def validar(self, jogo, ultimo_resultado=None):
+        """Atalho para um único jogo."""
+        if not self.estagios:
             return True
-            
-        # 1. Soma (Normal: 180-210, margem 160-230)
-        soma = sum(jogo)
-        if not (160 <= soma <= 230):
-            return False
-            
-        # 2. Primos (Normal: 4-6, margem 3-8)
-        primos = AdvancedFilters.count_primes(jogo)
-        if not (3 <= primos <= 8):
-            return False
-            
-        # 3. Fibonacci (Normal: 3-5, margem 2-7)
-        fib = AdvancedFilters.count_fibonacci(jogo)
-        if not (2 <= fib <= 7):
-            return False
-            
-        # 4. Sequências (Max 5-6 consecutivas)
-        seq = AdvancedFilters.count_consecutive(jogo)
-        if seq > 6: # Sequencia de 7 é muito rara
-            return False
-            
-        # 5. Repetentes do Anterior (Se disponível)
-        if ultimo_resultado:
-            repetidas = len(set(jogo).intersection(set(ultimo_resultado)))
-            # Normal é 8-10. Aceitamos 7-11
-            if not (7 <= repetidas <= 11):
-                return False
-                
-        return True
+        total_nums = CONFIG_LOTERIAS[self.loteria]['total_nums']
+        return bool(self.avaliar(games_to_matrix([jogo], total_nums), ultimo_resultado)[0])
+
+    def reordenar(self):
+        # Atribuição (não sort in-place): seguro com avaliações concorrentes
+        self.estagios = sorted(self.estagios, key=lambda e: e.custo() / e.taxa_rejeicao())
+
+    def combinar(self, outro):
+        """Soma os contadores de outro pipeline da mesma loteria (ex: shards em outros processos)."""
+        por_nome = {e.nome: e for e in self.estagios}
+        for estagio in outro.estagios:
+            destino = por_nome.get(estagio.nome)
+            if destino is None:
+                continue
+            destino.avaliados += estagio.avaliados
+            destino.rejeitados += estagio.rejeitados
+            destino.tempo += estagio.tempo
+        self.reordenar()
+
+    def relatorio(self):
+        """Contadores por estágio, na ordem de execução atual."""
+        return [e.relatorio() for e in self.estagios]
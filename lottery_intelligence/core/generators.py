@@ -1,69 +1,96 @@
 
-import pandas as pd
 import numpy as np
-import itertools
-import json
-from collections import Counter
-from ..core.config import CONFIG_LOTERIAS
-from ..core.filters import AdvancedFilters
-from ..intelligence.brain import LotteryAI
-from ..core.etl import get_db
+from ..core.config import CONFIG_LOTERIAS, STATS_JANELAS
+from ..core.filters import FilterPipeline
+from ..intelligence.model_cache import obter_modelo
+from ..core.etl import carregar_mascaras, carregar_estatisticas
+from ..core.stats import LotteryStats, compute_stats
+from ..core.bitmask import masks_to_games, matrix_to_games, games_to_matrix
 from ..core.coverage import CoverageEngine
+from ..core.combination_index import LotofacilIndex, masks_to_matrix25
+from ..core.combinadic import CombinationSpace, rank_jogo
 
-def carregar_stats(loteria):
-    conn = get_db()
-    df = pd.read_sql(f"SELECT dezenas FROM {loteria}", conn)
-    conn.close()
-    
-    nums_flat = []
-    historico = []
-    
-    for _, row in df.iterrows():
-        try:
-            d = json.loads(row['dezenas'])
-            nums_flat.extend(d)
-            historico.append(d)
-        except: pass
-        
-    if not nums_flat: return None, None
-    
-    # Frequencia
-    counts = Counter(nums_flat)
-    total_sorteios = len(df)
-    
-    stats_data = []
-    for n in range(1, CONFIG_LOTERIAS[loteria]['total_nums'] + 1):
-        freq = counts[n]
-        prob = freq / total_sorteios
-        
-        # Atraso (Delay)
-        delay = 0
-        for h in reversed(historico):
-            if n in h: break
-            delay += 1
-            
-        stats_data.append({'numero': n, 'frequencia': freq, 'prob': prob, 'atraso': delay})
-        
-    stats_df = pd.DataFrame(stats_data)
-    
-    # --- SCORING V2.0 ---
-    max_delay = stats_df['atraso'].max()
-    stats_df['score_freq'] = stats_df['prob'] # Quanto mais sai, melhor
-    stats_df['score_delay'] = stats_df['atraso'] / max_delay if max_delay > 0 else 0 # Quanto mais atrasado, melhor (teoria do retorno)
-    
-    # Peso de Recência (Hot Streak - Ultimos 30) - V2
-    ultimos_30 = historico[-30:] if len(historico) > 30 else historico
-    flat_30 = [n for sub in ultimos_30 for n in sub]
-    count_30 = Counter(flat_30)
-    stats_df['score_recent'] = stats_df['numero'].apply(lambda x: count_30[x] / 30)
-    
-    # Score Final: 40% Freq Global + 30% Atraso + 30% Recência
-    stats_df['score'] = (0.4 * stats_df['score_freq']) + (0.3 * stats_df['score_delay']) + (0.3 * stats_df['score_recent'])
-    
-    return stats_df, historico
+def carregar_stats(loteria, janelas=STATS_JANELAS, pesos=None, mascaras=None):
+    """
+    Retorna (LotteryStats, historico).
+    Usa a tabela persistida pelo ETL quando ela cobre as janelas pedidas;
+    caso contrário roda o kernel vetorizado sobre as máscaras.
+    mascaras: histórico já carregado (evita reler o banco).
+    """
+    if mascaras is None:
+        _, mascaras = carregar_mascaras(loteria)
+    
+    if len(mascaras) == 0: return None, None
+    
+    historico = masks_to_games(mascaras)
+    
+    estatisticas = carregar_estatisticas(loteria) if set(janelas) <= set(STATS_JANELAS) else None
+    if estatisticas is None:
+        return compute_stats(mascaras, loteria, janelas, pesos), historico
+    
+    stats = LotteryStats(
+        estatisticas['total_sorteios'],
+        estatisticas['frequencia'],
+        estatisticas['atraso'],
+        {w: estatisticas['janelas'][w] for w in janelas},
+        pesos
+    )
+    return stats, historico
 
 # --- GERADORES ---
 
+# Candidatos Lotofácil são gerados e pontuados em blocos: o bloco dobra a cada
+# rodada para não desperdiçar tentativas em orçamentos pequenos
+BLOCO_INICIAL = 128
+BLOCO_MAXIMO = 2048
+
+def gerar_bloco_lotofacil(nucleo, pool, n, ultimo_resultado, pipeline=None, rng=None):
+    """
+    Gera n candidatos de uma vez (núcleo + variáveis sorteadas do pool) como
+    matriz 0/1 (n x 25) e aplica o pipeline de filtros como máscaras sobre o bloco.
+    Retorna apenas as linhas aprovadas. Se o índice da Lotofácil foi construído,
+    as n linhas saem direto do conjunto válido (sem rejeição).
+    """
+    pipeline = pipeline or FilterPipeline.padrao('lotofacil')
+    rng = rng if rng is not None else np.random.default_rng()
+    
+    # Com o índice pré-computado, sorteia direto entre as combinações válidas
+    index = LotofacilIndex.carregar()
+    if index is not None:
+        validos = index.validos(nucleo, pool, ultimo_resultado, pipeline)
+        if len(validos) == 0:
+            return np.zeros((0, 25), dtype=np.uint8)
+        escolhidos = rng.choice(len(validos), n, replace=n > len(validos))
+        return masks_to_matrix25(validos[escolhidos])
+    
+    nucleo = np.asarray(nucleo, dtype=np.int64)
+    pool = np.asarray(pool, dtype=np.int64)
+    n_variaveis = 15 - len(nucleo)
+    
+    # Amostragem sem reposição em lote: argsort de chaves aleatórias por linha
+    indices = np.argsort(rng.random((n, len(pool))), axis=1)[:, :n_variaveis]
+    matriz = np.zeros((n, 25), dtype=np.uint8)
+    matriz[:, nucleo - 1] = 1
+    matriz[np.arange(n)[:, None], pool[indices] - 1] = 1
+    
+    aprovados = pipeline.avaliar(matriz, ultimo_resultado)
+    return matriz[aprovados]
+
+def pontuar_bloco(ai_model, candidatos, limiar=0.5):
+    """Mantém os candidatos (matriz 0/1) com score da IA >= limiar, numa única chamada predict_proba."""
+    if not ai_model or len(candidatos) == 0:
+        return candidatos
+    scores = ai_model.predict_scores(candidatos)
+    return candidatos[scores >= limiar]
+
+def sortear_combinacoes(espaco, n, pipeline, total_nums):
+    """
+    Sorteia até n combinações inéditas do espaço (sem materializar o espaço)
+    e devolve a matriz 0/1 das aprovadas no pipeline.
+    """
+    candidatos = games_to_matrix(espaco.sortear(n), total_nums)
+    return candidatos[pipeline.avaliar(candidatos)]
+
 def gerar_megasena(stats, orcamento, history):
     # Lógica Sniper (Simplificada para V4)
     # Seleciona Top Dezenas + Paridade
@@ -71,17 +98,14 @@ def gerar_megasena(stats, orcamento, history):
     qtd_jogos = int(orcamento // custo)
     jogos = []
     
-    top_nums = stats.sort_values('score', ascending=False).head(20)['numero'].values
-    combs = list(itertools.combinations(top_nums, 6))
-    np.random.shuffle(combs)
+    # C(20, 6) combinações do Top 20, sorteadas por rank
+    espaco = CombinationSpace(stats.ranking()[:20], 6)
+    pipeline = FilterPipeline.padrao('megasena')
     
-    for c in combs:
-        if len(jogos) >= qtd_jogos: break
-        
-        # Filtro Paridade (Mega: ideal 3P/3I ou 4P/2I ou 2P/4I)
-        pares = sum(1 for n in c if n % 2 == 0)
-        if 2 <= pares <= 4:
-            jogos.append(sorted(list(c)))
+    while len(jogos) < qtd_jogos and espaco.restantes:
+        # Filtros declarados (Mega: Paridade ideal 3P/3I ou 4P/2I ou 2P/4I)
+        aprovados = sortear_combinacoes(espaco, BLOCO_INICIAL, pipeline, CONFIG_LOTERIAS['megasena']['total_nums'])
+        jogos.extend(matrix_to_games(aprovados)[:qtd_jogos - len(jogos)])
             
     return jogos
 
@@ -100,22 +124,23 @@ def gerar_lotofacil(stats, orcamento, history):
     # - Coverage Engine DISABLED (Allows similar games)
     # - Filters: Active
     
-    sorted_stats = stats.sort_values('score', ascending=False)
+    ranking = stats.ranking()
     
     # 1. Núcleo Fixo (Top 4 - Classic V3)
-    nucleo_fixo = sorted_stats.head(4)['numero'].values
+    nucleo_fixo = ranking[:4]
     
     # 2. Pool Híbrido (12 Mornas + 5 Frias)
-    mornas = sorted_stats.iloc[4:16]['numero'].values
-    frias = sorted_stats.tail(5)['numero'].values
+    mornas = ranking[4:16]
+    frias = ranking[-5:]
     cobertura_pool = np.concatenate([mornas, frias]) # 17 dezenas
     
     # TREINAR AI
     ai_model = None
     if history and len(history) > 100:
-        ai_model = LotteryAI(history)
+        ai_model = obter_modelo('lotofacil', history)
 
     jogos = []
+    vistos = set()  # Ranks dos jogos já aceitos
     attempts = 0
     max_attempts = 20000 
     
@@ -124,27 +149,23 @@ def gerar_lotofacil(stats, orcamento, history):
     # --- NO COVERAGE ENGINE FOR LEGACY ---
     # We want to hit the "sweet spot", repetition is allowed if it passes filters.
     
+    bloco = BLOCO_INICIAL
     while len(jogos) < qtd_jogos and attempts < max_attempts:
-        attempts += 1
-        
-        # Gera jogo: 4 Fixas + 11 Variáveis (Classic V3)
-        variaveis = np.random.choice(cobertura_pool, 11, replace=False)
-        cand = sorted(list(np.concatenate([nucleo_fixo, variaveis])))
-        
-        # --- APLICANDO FILTROS V3 ---
-        if not AdvancedFilters.validar_v3(cand, 'lotofacil', ultimo_resultado):
-            continue
-            
-        # --- AI SCORING (Opcional no V3, mas ajuda) ---
-        if ai_model:
-            score = ai_model.predict_score(cand)
-            if score < 0.5: 
-                continue
+        # Gera e filtra um bloco de candidatos (4 Fixas + 11 Variáveis - Classic V3)
+        n = min(bloco, max_attempts - attempts)
+        attempts += n
+        bloco = min(bloco * 2, BLOCO_MAXIMO)
+        candidatos = gerar_bloco_lotofacil(nucleo_fixo, cobertura_pool, n, ultimo_resultado)
         
-        # Check Exists
-        cand_list = [int(x) for x in cand]
-        if cand_list not in jogos:
-            jogos.append(cand_list)
+        # --- AI SCORING em lote (Opcional no V3, mas ajuda) ---
+        for cand_list in matrix_to_games(pontuar_bloco(ai_model, candidatos)):
+            # Check Exists
+            chave = rank_jogo(cand_list)
+            if chave not in vistos:
+                vistos.add(chave)
+                jogos.append(cand_list)
+                if len(jogos) >= qtd_jogos:
+                    break
             
     return jogos
 
@@ -155,11 +176,12 @@ def gerar_lotomania(stats, orcamento, history):
     print(f"   [Legacy V3] Gerando {qtd_jogos} jogos (Espelho 2.0)...")
     
     jogos = []
+    vistos = set()
     
     # 1. Pool Estatístico (Top 80 - Clássico V3)
     # A V3 usava um pool de 80 dezenas e preenchia 40 quentes + 10 frias
-    pool_stats = stats.sort_values('score', ascending=False)
-    top_80 = pool_stats.head(80)['numero'].values
+    ranking = stats.ranking()
+    top_80 = ranking[:80]
     
     for _ in range(qtd_jogos):
         attempts = 0
@@ -181,7 +203,9 @@ def gerar_lotomania(stats, orcamento, history):
             cand_list = [int(x) for x in cand]
             
             # V3 não tinha filtros pesados pra Lotomania, apenas duplicata
-            if len(cand) == 50 and cand_list not in jogos:
+            chave = rank_jogo(cand_list)
+            if len(cand) == 50 and chave not in vistos:
+                vistos.add(chave)
                 jogos.append(cand_list)
                 break
                 
@@ -193,18 +217,11 @@ def gerar_lotomania(stats, orcamento, history):
 def gerar_diadesorte(stats, orcamento, history):
     custo = CONFIG_LOTERIAS['diadesorte']['preco']
     qtd_jogos = int(orcamento // custo)
-    jogos = []
     
     # Top 15 dezenas -> Combinar 7
-    pool = stats.sort_values('score', ascending=False).head(15)['numero'].values
-    
-    attempts = 0
-    while len(jogos) < qtd_jogos and attempts < 1000:
-        attempts += 1
-        cand = sorted(list(np.random.choice(pool, 7, replace=False)))
-        if cand not in jogos:
-            jogos.append(cand)
-    return jogos
+    # C(15, 7) = 6435: sorteio sem reposição por rank já garante jogos distintos
+    espaco = CombinationSpace(stats.ranking()[:15], 7)
+    return espaco.sortear(qtd_jogos).tolist()
 
 def gerar_jogos(loteria, orcamento=None):
     if not orcamento:
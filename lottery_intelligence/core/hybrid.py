@@ -3,215 +3,276 @@ Gerador Híbrido V6.0 (30% V3 Legacy / 70% V5 Calibrated)
 Anti-Vibe Implementation - SPEC Driven
 """
 
-import itertools
 import numpy as np
-from typing import List, Dict, Tuple
-from ..core.config import CONFIG_LOTERIAS
-from ..core.etl import get_db
-from ..core.generators import gerar_jogos, carregar_stats
-from ..core.filters import AdvancedFilters
-from ..intelligence.brain import LotteryAI
+from typing import List, Dict, Optional, Tuple
+from ..core.config import CONFIG_LOTERIAS, HYBRID_SHARD_JOGOS, HYBRID_POOL_MIN_JOGOS
+from ..core.generators import gerar_jogos, carregar_stats, gerar_bloco_lotofacil, pontuar_bloco, sortear_combinacoes, BLOCO_INICIAL, BLOCO_MAXIMO
+from ..core.filters import AdvancedFilters, FilterPipeline
+from ..intelligence.model_cache import obter_modelo
 from ..core.coverage import CoverageEngine
+from ..core.snapshot import obter_snapshot
+from ..core.bitmask import matrix_to_games, games_to_matrix
+from ..core.combinadic import CombinationSpace, rank_jogo
+from ..core.pool import executar_tarefas
 
-def gerar_v3_legacy_batch(loteria: str, qtd_jogos: int, stats, history) -> List[List[int]]:
+def gerar_v3_legacy_batch(loteria: str, qtd_jogos: int, stats, history, pipeline=None, rng=None, modelo=None) -> List[List[int]]:
     """
     Gera jogos usando lógica V3 Legacy (Sweet Spot).
     Núcleo Fixo + Pool Híbrido + Sem Coverage Engine.
+    modelo: LotteryAI já treinado (senão vem do cache de modelos pelo history).
     """
     custo = CONFIG_LOTERIAS[loteria]['preco']
-    sorted_stats = stats.sort_values('score', ascending=False)
+    ranking = stats.ranking()
+    pipeline = pipeline or FilterPipeline.padrao(loteria)
+    rng = rng if rng is not None else np.random.default_rng()
     
     if loteria == 'lotofacil':
-        nucleo_fixo = sorted_stats.head(4)['numero'].values
-        mornas = sorted_stats.iloc[4:16]['numero'].values
-        frias = sorted_stats.tail(5)['numero'].values
+        nucleo_fixo = ranking[:4]
+        mornas = ranking[4:16]
+        frias = ranking[-5:]
         cobertura_pool = np.concatenate([mornas, frias])
         
         # Treinar AI
-        ai_model = None
-        if history and len(history) > 100:
-            ai_model = LotteryAI(history)
+        ai_model = modelo
+        if ai_model is None and history and len(history) > 100:
+            ai_model = obter_modelo('lotofacil', history)
         
         ultimo_resultado = history[-1] if history else None
         jogos = []
+        vistos = set()  # Ranks dos jogos aceitos (dedup O(1))
         attempts = 0
         max_attempts = 20000
         
+        bloco = BLOCO_INICIAL
+        
         while len(jogos) < qtd_jogos and attempts < max_attempts:
-            attempts += 1
-            variaveis = np.random.choice(cobertura_pool, 11, replace=False)
-            cand = sorted(list(np.concatenate([nucleo_fixo, variaveis])))
-            
-            if not AdvancedFilters.validar_v3(cand, 'lotofacil', ultimo_resultado):
-                continue
+            n = min(bloco, max_attempts - attempts)
+            attempts += n
+            bloco = min(bloco * 2, BLOCO_MAXIMO)
+            candidatos = gerar_bloco_lotofacil(nucleo_fixo, cobertura_pool, n, ultimo_resultado, pipeline, rng)
             
-            if ai_model:
-                score = ai_model.predict_score(cand)
-                if score < 0.5:
-                    continue
-            
-            cand_list = [int(x) for x in cand]
-            if cand_list not in jogos:
-                jogos.append(cand_list)
+            for cand_list in matrix_to_games(pontuar_bloco(ai_model, candidatos)):
+                chave = rank_jogo(cand_list)
+                if chave not in vistos:
+                    vistos.add(chave)
+                    jogos.append(cand_list)
+                    if len(jogos) >= qtd_jogos:
+                        break
         
         return jogos
     
     elif loteria == 'lotomania':
-        pool_stats = sorted_stats.head(80)['numero'].values
+        pool_stats = ranking[:80]
         jogos = []
+        vistos = set()
 
         for _ in range(qtd_jogos):
             attempts = 0
             while attempts < 1000:
                 attempts += 1
-                quentes = np.random.choice(pool_stats, 40, replace=False)
+                quentes = rng.choice(pool_stats, 40, replace=False)
                 resto = [x for x in range(1, 101) if x not in quentes]
-                frias = np.random.choice(resto, 10, replace=False)
+                frias = rng.choice(resto, 10, replace=False)
                 cand = sorted(list(np.concatenate([quentes, frias])))
                 cand_list = [int(x) for x in cand]
 
-                if cand_list not in jogos:
+                chave = rank_jogo(cand_list)
+                if chave not in vistos:
+                    vistos.add(chave)
                     jogos.append(cand_list)
                     break
 
         return jogos
 
     elif loteria == 'megasena':
-        top_nums = sorted_stats.head(20)['numero'].values
-        combs = list(itertools.combinations(top_nums, 6))
-        np.random.shuffle(combs)
+        # C(20, 6) sorteado por rank, sem materializar as combinações
+        espaco = CombinationSpace(ranking[:20], 6, rng)
         jogos = []
-        for c in combs:
-            if len(jogos) >= qtd_jogos:
-                break
-            pares = sum(1 for n in c if n % 2 == 0)
-            if 2 <= pares <= 4:
-                jogos.append(sorted([int(x) for x in c]))
+        while len(jogos) < qtd_jogos and espaco.restantes:
+            aprovados = sortear_combinacoes(espaco, BLOCO_INICIAL, pipeline, CONFIG_LOTERIAS[loteria]['total_nums'])
+            jogos.extend(matrix_to_games(aprovados)[:qtd_jogos - len(jogos)])
         return jogos
 
     elif loteria == 'diadesorte':
-        pool = sorted_stats.head(15)['numero'].values
-        jogos = []
-        attempts = 0
-        while len(jogos) < qtd_jogos and attempts < 1000:
-            attempts += 1
-            cand = sorted([int(x) for x in np.random.choice(pool, 7, replace=False)])
-            if cand not in jogos:
-                jogos.append(cand)
-        return jogos
+        # Ranks sem reposição: jogos distintos sem varrer a lista
+        espaco = CombinationSpace(ranking[:15], 7, rng)
+        return espaco.sortear(qtd_jogos).tolist()
 
     return []
 
-def gerar_v5_calibrated_batch(loteria: str, qtd_jogos: int, stats, history) -> List[List[int]]:
+def gerar_v5_calibrated_batch(loteria: str, qtd_jogos: int, stats, history, pipeline=None, rng=None, modelo=None) -> List[List[int]]:
     """
     Gera jogos usando lógica V5.5 Calibrated (Coverage Engine + AI).
+    modelo: LotteryAI já treinado (senão vem do cache de modelos pelo history).
     """
     custo = CONFIG_LOTERIAS[loteria]['preco']
-    sorted_stats = stats.sort_values('score', ascending=False)
+    ranking = stats.ranking()
+    pipeline = pipeline or FilterPipeline.padrao(loteria)
+    rng = rng if rng is not None else np.random.default_rng()
     
     if loteria == 'lotofacil':
         # Núcleo A / B alternado
-        nucleo_a = sorted_stats.head(4)['numero'].values
-        nucleo_b = sorted_stats.iloc[2:6]['numero'].values
+        nucleo_a = ranking[:4]
+        nucleo_b = ranking[2:6]
         
-        mornas = sorted_stats.iloc[4:16]['numero'].values
-        frias = sorted_stats.tail(5)['numero'].values
+        mornas = ranking[4:16]
+        frias = ranking[-5:]
         cobertura_pool = np.concatenate([mornas, frias])
         
-        ai_model = None
-        if history and len(history) > 100:
-            ai_model = LotteryAI(history)
+        ai_model = modelo
+        if ai_model is None and history and len(history) > 100:
+            ai_model = obter_modelo('lotofacil', history)
         
         ultimo_resultado = history[-1] if history else None
         jogos = []
+        vistos = set()
         attempts = 0
         max_attempts = 10000
         
         coverage_engine = CoverageEngine(min_distance=4, game_type='lotofacil')
         
-        while len(jogos) < qtd_jogos and attempts < max_attempts:
-            attempts += 1
-            
-            if attempts == 5000:
-                coverage_engine.min_distance = 3
-            
-            current_nucleo = nucleo_a if len(jogos) % 2 == 0 else nucleo_b
-            pool_filtrado = [x for x in cobertura_pool if x not in current_nucleo]
-            variaveis = np.random.choice(pool_filtrado, 11, replace=False)
-            cand = sorted(list(np.concatenate([current_nucleo, variaveis])))
-            
-            if not AdvancedFilters.validar_v3(cand, 'lotofacil', ultimo_resultado):
+        # Fila de candidatos já filtrados e pontuados, por núcleo (A = pares, B = ímpares)
+        nucleos = [nucleo_a, nucleo_b]
+        pools = [[x for x in cobertura_pool if x not in nucleo] for nucleo in nucleos]
+        filas = [[], []]
+        bloco = BLOCO_INICIAL
+        
+        while len(jogos) < qtd_jogos:
+            lado = len(jogos) % 2
+            if not filas[lado]:
+                if attempts >= max_attempts:
+                    break
+                n = min(bloco, max_attempts - attempts)
+                attempts += n
+                bloco = min(bloco * 2, BLOCO_MAXIMO)
+                
+                if attempts >= 5000:
+                    coverage_engine.min_distance = 3
+                
+                candidatos = gerar_bloco_lotofacil(nucleos[lado], pools[lado], n, ultimo_resultado, pipeline, rng)
+                filas[lado] = matrix_to_games(pontuar_bloco(ai_model, candidatos))
                 continue
             
-            if ai_model:
-                score = ai_model.predict_score(cand)
-                if score < 0.5:
-                    continue
-            
-            cand_list = [int(x) for x in cand]
+            cand_list = filas[lado].pop()
             
             if not coverage_engine.is_diverse(cand_list, jogos):
                 continue
             
-            if cand_list not in jogos:
+            chave = rank_jogo(cand_list)
+            if chave not in vistos:
+                vistos.add(chave)
                 jogos.append(cand_list)
         
         return jogos
     
     elif loteria == 'lotomania':
-        pool = sorted_stats.head(80)['numero'].values
+        pool = ranking[:80]
         jogos = []
         attempts = 0
         max_attempts = 5000
 
         coverage_engine = CoverageEngine(min_distance=10, game_type='lotomania')
 
-        while len(jogos) < qtd_jogos and attempts < max_attempts:
-            attempts += 1
-            cand = sorted(list(np.random.choice(pool, 50, replace=False)))
-            cand_list = [int(x) for x in cand]
+        bloco = BLOCO_INICIAL
 
-            if not coverage_engine.is_diverse(cand_list, jogos):
-                continue
+        while len(jogos) < qtd_jogos and attempts < max_attempts:
+            # Bloco de candidatos (50 do pool, sem reposição) checado de uma vez
+            n = min(bloco, max_attempts - attempts)
+            attempts += n
+            bloco = min(bloco * 2, BLOCO_MAXIMO)
+            indices = np.argsort(rng.random((n, len(pool))), axis=1)[:, :50]
+            candidatos = np.zeros((n, 100), dtype=np.uint8)
+            candidatos[np.arange(n)[:, None], pool[indices] - 1] = 1
 
-            if cand not in jogos:
-                jogos.append(cand_list)
+            # Diversidade implica jogos distintos (distância mínima >= 6)
+            jogos.extend(coverage_engine.filter_diverse(candidatos, jogos, limit=qtd_jogos - len(jogos)))
 
         return jogos
 
     elif loteria == 'megasena':
-        top_nums = sorted_stats.head(20)['numero'].values
-        combs = list(itertools.combinations(top_nums, 6))
-        np.random.shuffle(combs)
+        espaco = CombinationSpace(ranking[:20], 6, rng)
         jogos = []
         coverage_engine = CoverageEngine(min_distance=2, game_type='megasena')
-        for c in combs:
-            if len(jogos) >= qtd_jogos:
-                break
-            pares = sum(1 for n in c if n % 2 == 0)
-            if 2 <= pares <= 4:
-                cand = sorted([int(x) for x in c])
-                if coverage_engine.is_diverse(cand, jogos):
-                    jogos.append(cand)
+        while len(jogos) < qtd_jogos and espaco.restantes:
+            aprovados = sortear_combinacoes(espaco, BLOCO_INICIAL, pipeline, CONFIG_LOTERIAS[loteria]['total_nums'])
+            jogos.extend(coverage_engine.filter_diverse(aprovados, jogos, limit=qtd_jogos - len(jogos)))
         return jogos
 
     elif loteria == 'diadesorte':
-        pool = sorted_stats.head(15)['numero'].values
+        espaco = CombinationSpace(ranking[:15], 7, rng)
         jogos = []
         attempts = 0
         coverage_engine = CoverageEngine(min_distance=2, game_type='diadesorte')
-        while len(jogos) < qtd_jogos and attempts < 5000:
-            attempts += 1
-            cand = sorted([int(x) for x in np.random.choice(pool, 7, replace=False)])
-            if coverage_engine.is_diverse(cand, jogos) and cand not in jogos:
-                jogos.append(cand)
+        # Mesmo orçamento de 5000 tentativas, agora sem repetir combinações
+        while len(jogos) < qtd_jogos and attempts < 5000 and espaco.restantes:
+            candidatos = espaco.sortear(min(BLOCO_INICIAL, 5000 - attempts))
+            attempts += len(candidatos)
+            candidatos = games_to_matrix(candidatos, CONFIG_LOTERIAS[loteria]['total_nums'])
+            jogos.extend(coverage_engine.filter_diverse(candidatos, jogos, limit=qtd_jogos - len(jogos)))
         return jogos
 
     return []
 
-def gerar_jogos_hybrid(loteria: str, orcamento: float) -> Tuple[List[Dict], Dict]:
+# Distância mínima que os lotes V5 garantem (piso após relaxamento), usada na
+# passada final de diversidade entre shards
+DISTANCIA_V5 = {'lotofacil': 3, 'lotomania': 10, 'megasena': 2, 'diadesorte': 2}
+
+# Rodadas extras para completar slots perdidos na deduplicação entre shards
+# (pedem o dobro do que falta: parte dos novos colide com o portfolio já aceito)
+RODADAS_COMPLEMENTO = 2
+
+def _gerar_shard(fonte: str, loteria: str, qtd_jogos: int, stats, history, semente: np.random.SeedSequence,
+                 modelo=None):
+    """
+    Executa um shard (em outro processo): retorna os jogos e o pipeline com seus contadores.
+    stats/history None: vêm do snapshot do próprio worker (carregado uma vez por
+    versão dos dados), em vez de serem serializados em cada tarefa.
+    """
+    if stats is None or history is None:
+        snapshot = obter_snapshot(loteria)
+        stats, history = snapshot.stats, snapshot.historico
+    pipeline = FilterPipeline(loteria)
+    rng = np.random.default_rng(semente)
+    gerador = gerar_v3_legacy_batch if fonte == 'v3_legacy' else gerar_v5_calibrated_batch
+    return gerador(loteria, qtd_jogos, stats, history, pipeline, rng, modelo), pipeline
+
+def _dividir(qtd_jogos: int) -> List[int]:
+    """Tamanhos dos shards: fixos pela quantidade (não pelo nº de workers) para ser reprodutível."""
+    if qtd_jogos <= 0:
+        return []
+    n_shards = -(-qtd_jogos // HYBRID_SHARD_JOGOS)
+    base, resto = divmod(qtd_jogos, n_shards)
+    return [base + (1 if i < resto else 0) for i in range(n_shards)]
+
+def _executar_shards(tarefas, loteria, stats, history, raiz: np.random.SeedSequence, modelo=None,
+                     injetados: bool = False):
+    """
+    Roda as tarefas (fonte, qtd) com sementes filhas da raiz; resultados na ordem das tarefas.
+    No pool só quando a rodada tem jogos suficientes para pagar a partida dos
+    processos (HYBRID_POOL_MIN_JOGOS); stats/history só seguem com as tarefas
+    quando foram injetados (senão cada worker usa o próprio snapshot).
+    """
+    sementes = raiz.spawn(len(tarefas))
+    paralelo = sum(qtd for _, qtd in tarefas) >= HYBRID_POOL_MIN_JOGOS[loteria]
+    if paralelo and not injetados:
+        stats = history = None
+    args = [(fonte, loteria, qtd, stats, history, sem, modelo) for (fonte, qtd), sem in zip(tarefas, sementes)]
+    return executar_tarefas(_gerar_shard, args, paralelo=paralelo)
+
+def gerar_jogos_hybrid(loteria: str, orcamento: float, seed: Optional[int] = None,
+                       stats=None, history=None, modelo=None, verbose: bool = True) -> Tuple[List[Dict], Dict]:
     """
     Orquestrador Híbrido V6.0.
+    Cada batch (V3/V5) é dividido em shards executados em paralelo, cada um com
+    seu fluxo de RNG (SeedSequence.spawn). O merge deduplica entre shards e
+    refaz a passada de diversidade dos jogos V5.
+    
+    seed: com o mesmo seed e a mesma versão dos dados o portfolio é idêntico
+    (os fluxos dos shards derivam de SeedSequence(seed)).
+    
+    stats/history: estatísticas e histórico injetados (ex: prefixo do
+    histórico no backtest walk-forward); por padrão vêm do snapshot atual.
+    modelo: LotteryAI já treinado para a Lotofácil (senão, cache de modelos).
     
     Returns:
         Tuple[games_with_metadata, stats_info]
@@ -223,16 +284,56 @@ def gerar_jogos_hybrid(loteria: str, orcamento: float) -> Tuple[List[Dict], Dict
     slots_v3 = int(total_jogos * 0.30)
     slots_v5 = total_jogos - slots_v3
     
-    print(f"   [Hybrid V6] Split: {slots_v3} V3 Legacy + {slots_v5} V5 Calibrated")
+    if verbose:
+        print(f"   [Hybrid V6] Split: {slots_v3} V3 Legacy + {slots_v5} V5 Calibrated")
+    
+    # Carregar estatísticas (snapshot em memória, reconstruído só quando há concurso novo)
+    injetados = stats is not None and history is not None
+    if not injetados:
+        snapshot = obter_snapshot(loteria)
+        if snapshot is None:
+            return [], {}
+        stats, history = snapshot.stats, snapshot.historico
+    
+    # Pipeline da requisição: soma os contadores de estágio de todos os shards
+    pipeline = FilterPipeline(loteria)
+    raiz = np.random.SeedSequence(seed)
+    coverage_engine = CoverageEngine(min_distance=DISTANCIA_V5[loteria], game_type=loteria)
     
-    # Carregar estatísticas
-    stats, history = carregar_stats(loteria)
-    if stats is None:
-        return [], {}
+    v3_games, v5_games = [], []
+    vistos = set()
+    faltam = {'v3_legacy': slots_v3, 'v5_calibrated': slots_v5}
     
-    # Gerar batches
-    v3_games = gerar_v3_legacy_batch(loteria, slots_v3, stats, history)
-    v5_games = gerar_v5_calibrated_batch(loteria, slots_v5, stats, history)
+    for rodada in range(1 + RODADAS_COMPLEMENTO):
+        fator = 1 if rodada == 0 else 2
+        tarefas = [(fonte, qtd) for fonte in ('v3_legacy', 'v5_calibrated') for qtd in _dividir(faltam[fonte] * fator)]
+        if not tarefas:
+            break
+        
+        novos = 0
+        for (fonte, _), (jogos, shard_pipeline) in zip(tarefas, _executar_shards(tarefas, loteria, stats, history, raiz, modelo, injetados)):
+            pipeline.combinar(shard_pipeline)
+            
+            # Dedup entre shards (e entre V3/V5) pelo rank do jogo
+            ineditos = []
+            for jogo in jogos:
+                chave = rank_jogo(jogo)
+                if chave not in vistos:
+                    vistos.add(chave)
+                    ineditos.append(jogo)
+            
+            if fonte == 'v3_legacy':
+                aceitos = ineditos[:faltam[fonte]]
+                v3_games.extend(aceitos)
+            else:
+                # Diversidade V5 contra os V5 de todos os shards anteriores
+                aceitos = coverage_engine.filter_diverse(ineditos, v5_games, limit=faltam[fonte]) if ineditos else []
+                v5_games.extend(aceitos)
+            faltam[fonte] -= len(aceitos)
+            novos += len(aceitos)
+        
+        if novos == 0:
+            break
     
     # Merge com metadados
     games_with_meta = []
@@ -253,7 +354,8 @@ def gerar_jogos_hybrid(loteria: str, orcamento: float) -> Tuple[List[Dict], Dict
     stats_info = {
         'total_games': len(games_with_meta),
         'v3_count': len(v3_games),
-        'v5_count': len(v5_games)
+        'v5_count': len(v5_games),
+        'filters': pipeline.relatorio()
     }
     
     return games_with_meta, stats_info
@@ -0,0 +1,64 @@
+"""
+Pool de Processos Compartilhado (V6.1)
+Um único ProcessPoolExecutor por processo para o trabalho CPU-bound em
+paralelo (shards da geração híbrida, simulação Monte Carlo), com
+HYBRID_WORKERS processos.
+"""
+
+import multiprocessing
+import multiprocessing.util
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, List, Optional
+from .config import HYBRID_WORKERS
+
+_executor = None
+_executor_lock = threading.Lock()
+_dentro_do_pool = False  # True nos workers (deste pool ou dos jobs da API): não aninha pools
+
+def marcar_worker():
+    """Initializer de processos worker: executar_tarefas roda tudo no próprio processo."""
+    global _dentro_do_pool
+    _dentro_do_pool = True
+
+def obter_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: o processo pai pode ter threads (BLAS, API) e fork com threads trava
+            _executor = ProcessPoolExecutor(max_workers=max(1, HYBRID_WORKERS),
+                                            mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=marcar_worker)
+            # Encerra o pool antes do join dos filhos na saída (ex: dentro de um worker da API)
+            multiprocessing.util.Finalize(None, encerrar_executor, exitpriority=100)
+        return _executor
+
+def encerrar_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+def executar_tarefas(funcao: Callable, tarefas: List[tuple],
+                     ao_concluir: Optional[Callable[[Any], None]] = None, paralelo: bool = True) -> List[Any]:
+    """
+    Executa funcao(*args) para cada tarefa: no pool quando há mais de uma e
+    HYBRID_WORKERS > 1, senão no próprio processo (também dentro de um worker,
+    ex: geração híbrida em cada tarefa do walk-forward, ou com paralelo=False
+    quando o chamador sabe que o trabalho é pequeno). Resultados na ordem das
+    tarefas; ao_concluir(resultado) é chamado à medida que cada uma termina.
+    """
+    if not paralelo or len(tarefas) <= 1 or HYBRID_WORKERS <= 1 or _dentro_do_pool:
+        resultados = []
+        for args in tarefas:
+            resultados.append(funcao(*args))
+            if ao_concluir is not None:
+                ao_concluir(resultados[-1])
+        return resultados
+
+    futuros = [obter_executor().submit(funcao, *args) for args in tarefas]
+    if ao_concluir is not None:
+        for futuro in as_completed(futuros):
+            ao_concluir(futuro.result())
+    return [f.result() for f in futuros]
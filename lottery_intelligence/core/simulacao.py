@@ -0,0 +1,126 @@
+"""
+Motor de Simulação de Sorteios (V6.1)
+Sorteios sem reposição gerados em blocos NumPy (Fisher-Yates parcial
+vetorizado: sorteia passos por bloco, não por dezena) para qualquer loteria de
+CONFIG_LOTERIAS.
+
+Fontes de aleatoriedade:
+  - PRNG (padrão): np.random.Generator com SeedSequence, reprodutível por seed;
+  - CSPRNG (csprng=True): inteiros lidos em lote de os.urandom (uma chamada por
+    passo do bloco), equivalente ao secrets do simulador legado.
+
+As contagens (frequência por dezena, pares e paridade) são acumuladas como
+reduções de array por bloco: a memória fica limitada a um bloco mesmo com
+10^8-10^9 sorteios, divididos em tarefas no pool compartilhado.
+"""
+
+import os
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from .config import CONFIG_LOTERIAS, SIM_BLOCO, SIM_TAREFA
+from .pool import executar_tarefas
+
+class FonteSorteios:
+    """Gera blocos de sorteios de `sorteia` dezenas distintas entre 1..total_nums."""
+
+    def __init__(self, total_nums: int, sorteia: int, semente=None, csprng: bool = False):
+        self.total_nums = int(total_nums)
+        self.sorteia = int(sorteia)
+        self.csprng = csprng
+        self.rng = None if csprng else np.random.default_rng(semente)
+
+    def _uniformes(self, limite: int, n: int) -> np.ndarray:
+        """n inteiros uniformes em [0, limite)."""
+        if not self.csprng:
+            return self.rng.integers(0, limite, size=n, dtype=np.int64)
+        # Multiplica-e-desloca sobre uint32 (viés <= limite / 2^32, desprezível)
+        bits = np.frombuffer(os.urandom(4 * n), dtype='<u4').astype(np.uint64)
+        return ((bits * np.uint64(limite)) >> np.uint64(32)).astype(np.int64)
+
+    def dezenas(self, n: int) -> np.ndarray:
+        """Matriz (n, sorteia) int16 com as dezenas de cada sorteio (não ordenadas)."""
+        perm = np.tile(np.arange(1, self.total_nums + 1, dtype=np.int16), (n, 1))
+        linhas = np.arange(n)
+        for j in range(self.sorteia):
+            alvo = j + self._uniformes(self.total_nums - j, n)
+            atual = perm[linhas, j].copy()
+            perm[linhas, j] = perm[linhas, alvo]
+            perm[linhas, alvo] = atual
+        return perm[:, :self.sorteia]
+
+    def matriz(self, n: int) -> np.ndarray:
+        """Matriz 0/1 (n, total_nums) uint8 dos sorteios."""
+        sorteios = np.zeros((n, self.total_nums), dtype=np.uint8)
+        np.put_along_axis(sorteios, self.dezenas(n).astype(np.int64) - 1, 1, axis=1)
+        return sorteios
+
+def _contar_tarefa(loteria: str, n: int, semente, csprng: bool) -> Dict[str, np.ndarray]:
+    """Simula n sorteios (em outro processo) e devolve só as contagens."""
+    cfg = CONFIG_LOTERIAS[loteria]
+    total_nums, sorteia = cfg['total_nums'], cfg['sorteia']
+    fonte = FonteSorteios(total_nums, sorteia, semente, csprng)
+
+    frequencia = np.zeros(total_nums, dtype=np.int64)
+    pares = np.zeros((total_nums, total_nums), dtype=np.int64)
+    paridade = np.zeros(sorteia + 1, dtype=np.int64)  # paridade[p] = sorteios com p dezenas pares
+
+    feitos = 0
+    while feitos < n:
+        b = min(SIM_BLOCO, n - feitos)
+        matriz = fonte.matriz(b)
+        frequencia += matriz.sum(axis=0, dtype=np.int64)
+        # Coocorrência M^T M em float32: exata enquanto o bloco tiver < 2^24 sorteios
+        m = matriz.astype(np.float32)
+        pares += (m.T @ m).astype(np.int64)
+        paridade += np.bincount(matriz[:, 1::2].sum(axis=1, dtype=np.int64), minlength=sorteia + 1)
+        feitos += b
+
+    np.fill_diagonal(pares, 0)
+    return {'n': n, 'frequencia': frequencia, 'pares': pares, 'paridade': paridade}
+
+def dividir_tarefas(n_sorteios: int) -> List[int]:
+    """Tamanhos das tarefas: fixos por n_sorteios (não pelo nº de workers), para ser reprodutível."""
+    completas, resto = divmod(max(0, int(n_sorteios)), SIM_TAREFA)
+    return [SIM_TAREFA] * completas + ([resto] if resto else [])
+
+def simular_sorteios(loteria: str, n_sorteios: int, seed: Optional[int] = None, csprng: bool = False,
+                     progresso: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    Simula n_sorteios concursos da loteria e acumula as contagens.
+
+    Args:
+        loteria: Nome da loteria (CONFIG_LOTERIAS)
+        n_sorteios: Concursos simulados
+        seed: Seed do PRNG (ignorado com csprng=True)
+        csprng: Usa os.urandom em lote em vez do PRNG
+        progresso: Callback (sorteios_feitos, n_sorteios), chamado a cada tarefa concluída
+
+    Returns:
+        Dict {
+            'sorteios': total simulado,
+            'frequencia': (total_nums,) vezes que cada dezena saiu (índice n-1),
+            'pares': (total_nums, total_nums) vezes que cada par saiu junto (simétrica, diagonal 0),
+            'paridade': (sorteia+1,) sorteios por quantidade de dezenas pares
+        }
+    """
+    tamanhos = dividir_tarefas(n_sorteios)
+    sementes = np.random.SeedSequence(seed).spawn(len(tamanhos))
+    tarefas = [(loteria, n, semente, csprng) for n, semente in zip(tamanhos, sementes)]
+
+    feitos = 0
+    def ao_concluir(parcial):
+        nonlocal feitos
+        feitos += parcial['n']
+        if progresso is not None:
+            progresso(feitos, n_sorteios)
+
+    parciais = executar_tarefas(_contar_tarefa, tarefas, ao_concluir)
+
+    cfg = CONFIG_LOTERIAS[loteria]
+    total_nums, sorteia = cfg['total_nums'], cfg['sorteia']
+    return {
+        'sorteios': sum(p['n'] for p in parciais),
+        'frequencia': sum((p['frequencia'] for p in parciais), np.zeros(total_nums, dtype=np.int64)),
+        'pares': sum((p['pares'] for p in parciais), np.zeros((total_nums, total_nums), dtype=np.int64)),
+        'paridade': sum((p['paridade'] for p in parciais), np.zeros(sorteia + 1, dtype=np.int64)),
+    }
@@ -0,0 +1,84 @@
+"""
+Cache de Snapshots por Loteria (V6.1)
+Mantém em memória, por processo, o histórico já decodificado e as estatísticas
+de cada loteria. A chave é a versão dos dados (MAX(concurso), COUNT(*), revisão):
+o ETL avança a revisão em estatisticas_meta a cada gravação (inclusive correções
+de concursos antigos), a chave muda e o snapshot é reconstruído.
+"""
+
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .etl import carregar_mascaras
+from .db import conexao_leitura
+from .generators import carregar_stats
+from .stats import LotteryStats
+
+class StatsSnapshot:
+    """Histórico (listas e máscaras) + estatísticas de uma versão dos dados."""
+    __slots__ = ('loteria', 'versao', 'concursos', 'mascaras', 'historico', 'stats')
+
+    def __init__(self, loteria: str, versao: Tuple[int, int, int], concursos: np.ndarray,
+                 mascaras: np.ndarray, historico: List[List[int]], stats: LotteryStats):
+        self.loteria = loteria
+        self.versao = versao
+        self.concursos = concursos
+        self.mascaras = mascaras
+        self.historico = historico
+        self.stats = stats
+
+_snapshots: Dict[str, StatsSnapshot] = {}
+_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+def versao_dados(loteria: str, conn=None) -> Tuple[int, int, int]:
+    """Versão dos dados de uma loteria: (maior concurso, total de concursos, revisão do ETL)."""
+    if conn is None:
+        conn = conexao_leitura()
+    max_concurso, total = conn.execute(f"SELECT MAX(concurso), COUNT(*) FROM {loteria}").fetchone()
+    try:
+        row = conn.execute("SELECT revisao FROM estatisticas_meta WHERE loteria = ?", (loteria,)).fetchone()
+    except sqlite3.OperationalError:
+        # Base antiga sem a coluna (ex: montada read-only antes da migração)
+        row = None
+    return (max_concurso or 0, total, (row[0] or 0) if row else 0)
+
+def _lock_for(loteria: str) -> threading.Lock:
+    with _registry_lock:
+        return _locks.setdefault(loteria, threading.Lock())
+
+def obter_snapshot(loteria: str) -> Optional[StatsSnapshot]:
+    """
+    Retorna o snapshot atual da loteria, reconstruindo-o apenas quando a versão
+    dos dados mudou. Requisições concorrentes esperam uma única reconstrução.
+    Retorna None se não houver histórico.
+    """
+    versao = versao_dados(loteria)
+    snapshot = _snapshots.get(loteria)
+    if snapshot is not None and snapshot.versao == versao:
+        return snapshot
+
+    with _lock_for(loteria):
+        snapshot = _snapshots.get(loteria)
+        if snapshot is not None and snapshot.versao == versao:
+            return snapshot
+
+        conn = conexao_leitura()
+        versao = versao_dados(loteria, conn)
+        concursos, mascaras = carregar_mascaras(loteria, conn)
+        stats, historico = carregar_stats(loteria, mascaras=mascaras)
+        if stats is None:
+            _snapshots.pop(loteria, None)
+            return None
+
+        snapshot = StatsSnapshot(loteria, versao, concursos, mascaras, historico, stats)
+        _snapshots[loteria] = snapshot
+        return snapshot
+
+def invalidar_snapshot(loteria: Optional[str] = None):
+    """Descarta o snapshot de uma loteria (ou de todas). Chamado pelo ETL."""
+    if loteria is None:
+        _snapshots.clear()
+    else:
+        _snapshots.pop(loteria, None)
@@ -0,0 +1,101 @@
+"""
+Motor de Estatísticas Vetorizado (V6.1)
+Monta a matriz de ocorrência (concursos x dezenas) uma única vez e usa somas
+cumulativas para extrair frequência, atraso e recência de qualquer conjunto de
+janelas, em qualquer ponto do histórico.
+"""
+
+import numpy as np
+from typing import Dict, Iterable, Optional
+from .config import CONFIG_LOTERIAS, STATS_JANELAS, SCORE_PESOS
+from .bitmask import masks_to_matrix
+
+class LotteryStats:
+    """
+    Resultado compacto: arrays NumPy indexados por (dezena - 1).
+    Substitui o DataFrame da V2.0 (numero/frequencia/prob/atraso/score...).
+    """
+    __slots__ = ('numeros', 'total_sorteios', 'frequencia', 'prob', 'atraso',
+                 'recencia', 'score', '_ranking')
+
+    def __init__(self, total_sorteios: int, frequencia: np.ndarray, atraso: np.ndarray,
+                 janelas: Dict[int, np.ndarray], pesos: Optional[Dict[str, float]] = None):
+        self.numeros = np.arange(1, len(frequencia) + 1)
+        self.total_sorteios = int(total_sorteios)
+        self.frequencia = np.asarray(frequencia, dtype=np.int64)
+        self.atraso = np.asarray(atraso, dtype=np.int64)
+        self.prob = self.frequencia / max(self.total_sorteios, 1)
+        # Recência normalizada pelo tamanho da janela (contagem / w)
+        self.recencia = {int(w): np.asarray(c, dtype=np.int64) / w for w, c in janelas.items()}
+        self.score = self._pontuar(pesos or SCORE_PESOS)
+        self._ranking = None
+
+    def features(self) -> Dict[str, np.ndarray]:
+        """Features normalizadas disponíveis para o score."""
+        max_delay = self.atraso.max(initial=0)
+        feats = {
+            'frequencia': self.prob,  # Quanto mais sai, melhor
+            'atraso': self.atraso / max_delay if max_delay > 0 else np.zeros(len(self.atraso)),  # Teoria do retorno
+        }
+        for w, rec in self.recencia.items():
+            feats[f'recencia_{w}'] = rec
+        return feats
+
+    def _pontuar(self, pesos: Dict[str, float]) -> np.ndarray:
+        feats = self.features()
+        score = np.zeros(len(self.frequencia))
+        for nome, peso in pesos.items():
+            if nome not in feats:
+                raise KeyError(f"Feature de score desconhecida: {nome} (janelas: {sorted(self.recencia)})")
+            score += peso * feats[nome]
+        return score
+
+    def ranking(self) -> np.ndarray:
+        """Dezenas ordenadas por score decrescente (empates pela menor dezena)."""
+        if self._ranking is None:
+            self._ranking = self.numeros[np.argsort(-self.score, kind='stable')]
+        return self._ranking
+
+class StatsKernel:
+    """
+    Pré-computa, em uma passada, as contagens cumulativas e a última posição
+    de cada dezena. Qualquer snapshot (prefixo t, janelas arbitrárias) sai
+    depois em O(total_nums x janelas).
+    """
+
+    def __init__(self, matrix: np.ndarray):
+        matrix = np.asarray(matrix, dtype=np.uint8)
+        self.total_sorteios, self.total_nums = matrix.shape
+        # cumulativo[t] = ocorrências nos concursos [0, t)
+        self.cumulativo = np.zeros((self.total_sorteios + 1, self.total_nums), dtype=np.int32)
+        np.cumsum(matrix, axis=0, dtype=np.int32, out=self.cumulativo[1:])
+        # ultima_posicao[t] = último índice < t em que a dezena saiu (-1 se nunca)
+        posicoes = np.where(matrix.astype(bool), np.arange(self.total_sorteios)[:, None], -1)
+        self.ultima_posicao = np.full((self.total_sorteios + 1, self.total_nums), -1, dtype=np.int32)
+        if self.total_sorteios:
+            np.maximum.accumulate(posicoes, axis=0, out=self.ultima_posicao[1:])
+
+    @classmethod
+    def from_masks(cls, mascaras: np.ndarray, loteria: str) -> 'StatsKernel':
+        return cls(masks_to_matrix(mascaras, CONFIG_LOTERIAS[loteria]['total_nums']))
+
+    def counts(self, t: Optional[int] = None, janelas: Iterable[int] = STATS_JANELAS):
+        """Frequência, atraso e contagens por janela considerando os concursos [0, t)."""
+        t = self.total_sorteios if t is None else int(t)
+        freq = self.cumulativo[t].astype(np.int64)
+        ult = self.ultima_posicao[t]
+        atraso = np.where(ult >= 0, t - 1 - ult, t).astype(np.int64)
+        janelas = {int(w): (self.cumulativo[t] - self.cumulativo[max(t - int(w), 0)]).astype(np.int64)
+                   for w in janelas}
+        return freq, atraso, janelas
+
+    def snapshot(self, t: Optional[int] = None, janelas: Iterable[int] = STATS_JANELAS,
+                 pesos: Optional[Dict[str, float]] = None) -> LotteryStats:
+        t = self.total_sorteios if t is None else int(t)
+        freq, atraso, contagens = self.counts(t, janelas)
+        return LotteryStats(t, freq, atraso, contagens, pesos)
+
+def compute_stats(mascaras: np.ndarray, loteria: str, janelas: Iterable[int] = STATS_JANELAS,
+                  pesos: Optional[Dict[str, float]] = None) -> LotteryStats:
+    """Atalho: estatísticas do histórico completo a partir das máscaras."""
+    return StatsKernel.from_masks(mascaras, loteria).snapshot(janelas=janelas, pesos=pesos)
@@ -2,9 +2,17 @@ import requests
 import hashlib
 import json
 import os
+import queue
 import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
+import numpy as np
 import urllib3
+from ..core.bitmask import games_to_masks, count_hits
+from ..core.config import CONFIG_LOTERIAS
 
 # Suppress SSL warnings for official Caixa API (often has cert issues)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -33,40 +41,146 @@ class LotteryAuditor:
         'diadesorte': {4: 2.50, 5: 25.00, 6: 2000.00, 7: 1000000.00}
     }
 
-    def __init__(self):
+    # Numbers per bet each lottery accepts (min, max)
+    BET_SIZES = {'megasena': (6, 20), 'lotofacil': (15, 20), 'lotomania': (50, 50), 'diadesorte': (7, 15)}
+
+    # Section headers of a bet file: a markdown heading, a line that is all bold,
+    # or a "**Loteria**:" field. Prose naming a lottery does not switch sections.
+    SECTION_HEADER = re.compile(r'^\s*(#{1,6}\s|\*\*[^*]+\*\*\s*$|\*\*loteria\*\*\s*:)', re.IGNORECASE)
+
+    # Per-provider request timeout (seconds); all providers are queried at once
+    TIMEOUT = 10
+
+    # Persistent result cache. A finished contest never changes, so only the
+    # 'latest' lookup expires.
+    CACHE_PATH = os.environ.get("AUDITOR_CACHE_PATH", "auditor_cache.db")
+    LATEST_TTL = 300
+
+    def __init__(self, providers: Optional[List[Dict[str, str]]] = None,
+                 cache_path: Optional[str] = None, timeout: Optional[float] = None):
+        self.providers = providers if providers is not None else self.PROVIDERS
+        self.cache_path = cache_path if cache_path is not None else self.CACHE_PATH
+        self.timeout = timeout if timeout is not None else self.TIMEOUT
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        self._cache_lock = threading.Lock()
+        self._cache_ready = False
+
+    # --- Result cache ---
+    def _cache_conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.cache_path, timeout=10)
+        if not self._cache_ready:
+            with self._cache_lock:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS resultados (
+                        loteria TEXT,
+                        concurso TEXT,
+                        payload TEXT,
+                        fetched_at REAL,
+                        PRIMARY KEY (loteria, concurso)
+                    )
+                """)
+                conn.commit()
+                self._cache_ready = True
+        return conn
+
+    def _cache_get(self, loteria: str, concurso: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_path:
+            return None
+        try:
+            conn = self._cache_conn()
+            try:
+                row = conn.execute(
+                    "SELECT payload, fetched_at FROM resultados WHERE loteria = ? AND concurso = ?",
+                    (loteria, concurso)
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        if row is None or (concurso == 'latest' and time.time() - row[1] > self.LATEST_TTL):
+            return None
+        return json.loads(row[0])
+
+    def _cache_put(self, loteria: str, result: Dict[str, Any], latest: bool):
+        if not self.cache_path:
+            return
+        payload = json.dumps(result)
+        now = time.time()
+        keys = [str(result['concurso'])] + (['latest'] if latest else [])
+        try:
+            conn = self._cache_conn()
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO resultados (loteria, concurso, payload, fetched_at) VALUES (?, ?, ?, ?)",
+                        [(loteria, key, payload, now) for key in keys]
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Auditor] Result cache unavailable: {e}")
+
+    # --- Providers ---
+    def _fetch_from_provider(self, provider: Dict[str, str], loteria: str, concurso: str) -> Dict[str, Any]:
+        if concurso == 'latest':
+            url = provider['latest_url'].format(loteria=loteria)
+        else:
+            url = provider['url_template'].format(loteria=loteria, concurso=concurso)
+
+        response = self.session.get(url, timeout=self.timeout, verify=False)
+        response.raise_for_status()
+        data = response.json()
+
+        # Dynamic dispatch to parser
+        parser_method = getattr(self, provider['parser'])
+        result = parser_method(data, loteria)
+        if result.get('concurso') is None or not result.get('dezenas'):
+            raise ValueError("incomplete result")
+        if concurso != 'latest' and str(result['concurso']) != concurso:
+            raise ValueError(f"returned contest {result['concurso']}")
+        return result
+
+    def _hedge_request(self, provider: Dict[str, str], loteria: str, concurso: str, answers: "queue.Queue"):
+        try:
+            answers.put((provider, self._fetch_from_provider(provider, loteria, concurso), None))
+        except Exception as e:
+            answers.put((provider, None, e))
 
     def fetch_official_result(self, loteria: str, concurso: str = 'latest') -> Dict[str, Any]:
         """
-        Fetches official result using multiple providers with fallback.
+        Fetches the official result, hedging across all providers: every
+        provider is queried concurrently and the first valid answer wins, so a
+        dead provider no longer delays the audit. Results are cached on disk.
         """
+        concurso = str(concurso) if concurso == 'latest' else str(int(concurso))
+        cached = self._cache_get(loteria, concurso)
+        if cached is not None:
+            print(f"[Auditor] Using cached result for {loteria} {concurso}.")
+            return cached
+
+        if not self.providers:
+            raise RuntimeError("No result providers configured")
+
+        # Daemon threads: abandoned slower providers never hold up interpreter exit
+        answers: "queue.Queue" = queue.Queue()
+        for provider in self.providers:
+            threading.Thread(target=self._hedge_request, args=(provider, loteria, concurso, answers),
+                             daemon=True).start()
+
         last_error = None
-        for provider in self.PROVIDERS:
-            try:
-                # Prepare URL
-                if concurso == 'latest':
-                    url = provider['latest_url'].format(loteria=loteria)
-                else:
-                    url = provider['url_template'].format(loteria=loteria, concurso=concurso)
-
-                print(f"[Auditor] Trying provider: {provider['name']} ({url})...")
-                
-                response = self.session.get(url, timeout=10, verify=False)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Dynamic dispatch to parser
-                parser_method = getattr(self, provider['parser'])
-                return parser_method(data, loteria)
-
-            except Exception as e:
-                print(f"[Auditor] Provider {provider['name']} failed: {e}")
-                last_error = e
+        for _ in self.providers:
+            provider, result, error = answers.get()
+            if error is not None:
+                print(f"[Auditor] Provider {provider['name']} failed: {error}")
+                last_error = error
                 continue
-        
+            print(f"[Auditor] Result from provider: {provider['name']}")
+            self._cache_put(loteria, result, latest=concurso == 'latest')
+            return result
+
         raise RuntimeError(f"All providers failed. Last error: {last_error}")
 
     def parse_guidi(self, data: Dict, loteria: str) -> Dict:
@@ -97,61 +211,137 @@ class LotteryAuditor:
         table = self.PRIZE_TABLE.get(loteria, {})
         return table.get(hits, 0.0)
 
-    def audit_file(self, filepath: str, concurso_input: str = None) -> str:
+    # --- Bet file parsing ---
+    # Lottery names that open a section of a bet file (matched on lowercase text)
+    LOTTERY_PATTERNS = [
+        ('megasena', re.compile(r'mega[\s\-_]*sena')),
+        ('lotofacil', re.compile(r'lotof[aá]cil')),
+        ('lotomania', re.compile(r'lotomania')),
+        ('diadesorte', re.compile(r'dia[\s\-_]*de[\s\-_]*sorte')),
+    ]
+    LOTTERY_MARKERS = {'🟣': 'lotofacil', '🟠': 'lotomania'}
+
+    def _match_lottery(self, text: str) -> Optional[str]:
+        """Lottery named earliest in the text (falls back to the colour markers)."""
+        text = text.lower()
+        found = [(m.start(), loteria) for loteria, pattern in self.LOTTERY_PATTERNS
+                 for m in [pattern.search(text)] if m]
+        if found:
+            return min(found)[1]
+        for marker, loteria in self.LOTTERY_MARKERS.items():
+            if marker in text:
+                return loteria
+        return None
+
+    @staticmethod
+    def _number_bits(loteria: str, nums: List[int]) -> List[int]:
+        """
+        Numbers as bitmask positions. Lotomania prints 100 as "00" (in results
+        and bet rows): map 0 -> 100 so every number has a bit.
         """
-        Audits a markdown file containing bets.
+        if loteria == 'lotomania':
+            return [100 if n == 0 else n for n in nums]
+        return nums
+
+    def _valid_bet(self, loteria: str, nums: List[int]) -> bool:
+        """Bet size within BET_SIZES, no repeated numbers and every number on the card."""
+        low, high = self.BET_SIZES[loteria]
+        total_nums = CONFIG_LOTERIAS[loteria]['total_nums']
+        bits = self._number_bits(loteria, nums)
+        return (low <= len(bits) <= high and len(set(bits)) == len(bits)
+                and all(1 <= n <= total_nums for n in bits))
+
+    @staticmethod
+    def _parse_game_row(line: str) -> Optional[List[int]]:
+        """
+        Numbers of a markdown table row.
+        Supporting formats: '`01, 02...`' or '`[1, 2...]`'
+        """
+        try:
+            raw_nums = line.split('`')[1]
+            # Clean brackets if present
+            raw_nums = raw_nums.replace('[', '').replace(']', '')
+            nums = [int(x.strip()) for x in raw_nums.split(',') if x.strip()]
+        except (IndexError, ValueError):
+            return None
+        return nums or None
+
+    def parse_bet_file(self, filepath: str, loteria: Optional[str] = None,
+                       rejected: Optional[List[tuple]] = None) -> Dict[str, List[tuple]]:
+        """
+        Parses a (possibly multi-lottery) bet file in one streaming pass.
+        A section header (SECTION_HEADER) naming a lottery opens its section;
+        game rows go to the current section. Rows before the first section
+        belong to the lottery named in the file name, or to the only section in
+        the file. loteria forces every game into that lottery.
+
+        Rows that are not a valid bet for their lottery (size outside
+        BET_SIZES, repeated numbers, numbers off the card) are left out; pass a
+        list as rejected to receive them as (loteria, line_index, numbers).
+
+        Returns {loteria: [(line_index, numbers), ...]} in file order.
         """
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"File not found: {filepath}")
 
+        file_lottery = loteria or self._match_lottery(os.path.basename(filepath))
+        current = None
+        batches: Dict[str, List[tuple]] = {}
+        unassigned = []
         with open(filepath, 'r') as f:
-            content = f.read()
+            for i, line in enumerate(f):
+                if '|' in line and '`' in line:
+                    nums = self._parse_game_row(line)
+                    if nums is None:
+                        continue
+                    target = current or file_lottery
+                    if target is None:
+                        unassigned.append((i, nums))
+                    else:
+                        batches.setdefault(target, []).append((i, nums))
+                elif loteria is None and self.SECTION_HEADER.match(line):
+                    current = self._match_lottery(line) or current
 
-        # Detect Lottery
-        loteria = None
-        if 'lotomania' in content.lower() or 'lotomania' in filepath.lower(): loteria = 'lotomania'
-        elif 'lotofacil' in content.lower() or 'lotofacil' in filepath.lower(): loteria = 'lotofacil'
-        elif 'megasena' in content.lower() or 'megasena' in filepath.lower(): loteria = 'megasena'
-        
-        if not loteria:
-            # Default fallback if unknown, check content specific headers
-            if '🟣' in content: loteria = 'lotofacil'
-            elif '🟠' in content: loteria = 'lotomania'
-            else: raise ValueError("Could not detect lottery type from file content.")
+        if unassigned:
+            if len(batches) != 1:
+                raise ValueError(f"Could not detect lottery type for games in {os.path.basename(filepath)}.")
+            target = next(iter(batches))
+            batches[target] = sorted(unassigned + batches[target])
 
-        # Fetch Result
-        try:
-            official_data = self.fetch_official_result(loteria, concurso_input or 'latest')
-        except RuntimeError as e:
-            return f"❌ AUDIT ERROR: {str(e)}"
+        valid: Dict[str, List[tuple]] = {}
+        for target, jogos in batches.items():
+            for i, nums in jogos:
+                if self._valid_bet(target, nums):
+                    valid.setdefault(target, []).append((i, nums))
+                elif rejected is not None:
+                    rejected.append((target, i, nums))
+        return valid
+
+    # --- Contest audit (official result) ---
+    def _audit_lottery(self, loteria: str, concurso: str, jogos: List[List[int]]):
+        """Fetches the contest result once and scores every game of the lottery."""
+        official_data = self.fetch_official_result(loteria, concurso)
+        winning_masks = games_to_masks([self._number_bits(loteria, official_data['dezenas'])])
+        game_masks = games_to_masks([self._number_bits(loteria, jogo) for jogo in jogos])
+        hits = count_hits(game_masks, winning_masks)[:, 0] if jogos else np.zeros(0, dtype=np.uint8)
+        return official_data, hits
 
+    def _game_report(self, filepath: str, loteria: str, official_data: Dict[str, Any],
+                     jogos: List[tuple], hits_per_game: np.ndarray, skipped: int = 0) -> str:
         winning_numbers = set(official_data['dezenas'])
         concurso_real = official_data['concurso']
-        
-        # Parse numbers from MD
-        # Supporting formats: '`01, 02...`' or '`[1, 2...]`'
-        jogos = []
-        lines = content.split('\n')
-        for i, line in enumerate(lines):
-            if '|' in line and '`' in line:
-                try:
-                    raw_nums = line.split('`')[1]
-                    # Clean brackets if present
-                    raw_nums = raw_nums.replace('[','').replace(']','')
-                    # Split and int
-                    nums = [int(x.strip()) for x in raw_nums.split(',') if x.strip()]
-                    jogos.append((i, nums)) # Store index for reference if needed
-                except:
-                    continue
-        
-        if not jogos:
-            return "❌ No valid games found to audit."
 
         # Generate Report
         report = f"# 🛡️ Audit Report V5.4\n"
         report += f"**File**: `{os.path.basename(filepath)}`\n"
+        report += f"**Lottery**: {loteria.upper()}\n"
         report += f"**Contest**: {concurso_real} ({official_data['data']})\n"
-        report += f"**Winning Numbers**: `{sorted(list(winning_numbers))}`\n\n"
+        report += f"**Winning Numbers**: `{sorted(list(winning_numbers))}`\n"
+        if skipped:
+            low, high = self.BET_SIZES[loteria]
+            size = f"{low}" if low == high else f"{low}-{high}"
+            report += f"**Skipped Rows**: {skipped} (not a valid {size}-number bet)\n"
+        report += "\n"
         report += "---\n\n"
         
         total_prize = 0.0
@@ -159,13 +349,11 @@ class LotteryAuditor:
         rows = ""
         
         for idx, (line_idx, jogo) in enumerate(jogos):
-            hits = set(jogo).intersection(winning_numbers)
-            qtd = len(hits)
+            # Hit count comes from count_hits; the set only lists the matched numbers
+            hits = sorted(set(jogo) & winning_numbers)
+            qtd = int(hits_per_game[idx])
+            # Mirror rule for Lotomania: 0 hits is a prize tier in the table
             prize = self._calculate_profit(loteria, qtd)
-            
-            # Mirror rule for Lotomania
-            if loteria == 'lotomania' and qtd == 0:
-                prize = self._calculate_profit(loteria, 0)
 
             total_prize += prize
             
@@ -174,7 +362,7 @@ class LotteryAuditor:
             if loteria == 'lotomania' and qtd >= 14 and prize == 0: icon = "🔥 (Near Miss)"
             if loteria == 'lotofacil' and qtd >= 10 and prize == 0: icon = "🔥 (Near Miss)"
 
-            rows += f"| {idx+1:02d} | **{qtd:02d}** | `{sorted(list(hits))}` | {icon} |\n"
+            rows += f"| {idx+1:02d} | **{qtd:02d}** | `{hits}` | {icon} |\n"
 
         report += header + rows + "\n"
         report += "---\n"
@@ -185,3 +373,178 @@ class LotteryAuditor:
         report += f"\n> **Integrity Hash**: `{audit_hash}`\n"
         
         return report
+
+    def audit_files(self, filepaths: List[str], concurso_input: str = None) -> str:
+        """
+        Audits many (multi-lottery) bet files against one contest. Each file is
+        parsed in a single pass; each lottery is audited concurrently with its
+        official result fetched once and shared by every file.
+        """
+        concurso = concurso_input or 'latest'
+        parsed = []
+        skipped: Dict[tuple, int] = {}
+        for filepath in filepaths:
+            rejected = []
+            parsed.append((filepath, self.parse_bet_file(filepath, rejected=rejected)))
+            for loteria, _, _ in rejected:
+                skipped[(filepath, loteria)] = skipped.get((filepath, loteria), 0) + 1
+
+        # Every game of a lottery, across files, scored in one batch
+        games_by_lottery: Dict[str, List[List[int]]] = {}
+        offsets = {}
+        for filepath, batches in parsed:
+            for loteria, jogos in batches.items():
+                games = games_by_lottery.setdefault(loteria, [])
+                offsets[(filepath, loteria)] = len(games)
+                games.extend(nums for _, nums in jogos)
+
+        outcomes: Dict[str, Any] = {}
+        if games_by_lottery:
+            with ThreadPoolExecutor(max_workers=len(games_by_lottery)) as executor:
+                futures = {
+                    loteria: executor.submit(self._audit_lottery, loteria, concurso, games)
+                    for loteria, games in games_by_lottery.items()
+                }
+                for loteria, future in futures.items():
+                    try:
+                        outcomes[loteria] = future.result()
+                    except Exception as e:
+                        outcomes[loteria] = e
+
+        reports = []
+        for filepath, batches in parsed:
+            if not batches:
+                invalid = sum(n for (path, _), n in skipped.items() if path == filepath)
+                reports.append("❌ No valid games found to audit."
+                               + (f" ({invalid} invalid rows skipped)" if invalid else ""))
+            for loteria, jogos in batches.items():
+                outcome = outcomes[loteria]
+                if isinstance(outcome, Exception):
+                    reports.append(f"❌ AUDIT ERROR: {outcome}")
+                    continue
+                official_data, hits = outcome
+                start = offsets[(filepath, loteria)]
+                reports.append(self._game_report(filepath, loteria, official_data, jogos,
+                                                 hits[start:start + len(jogos)],
+                                                 skipped.get((filepath, loteria), 0)))
+        return "\n\n".join(reports)
+
+    def audit_file(self, filepath: str, concurso_input: str = None) -> str:
+        """
+        Audits a markdown file containing bets (one report per lottery section).
+        """
+        return self.audit_files([filepath], concurso_input)
+
+    # --- Offline bulk audit (local DB) ---
+    def _prize_lookup(self, loteria: str, max_hits: int) -> np.ndarray:
+        """Prize per hit count as an array indexed by hits (0..max_hits)."""
+        table = self.PRIZE_TABLE.get(loteria, {})
+        lookup = np.zeros(max_hits + 1, dtype=np.float64)
+        for hits, prize in table.items():
+            if hits < len(lookup):
+                lookup[hits] = prize
+        return lookup
+
+    def audit_range(self, filepaths: List[str], concurso_inicio: Optional[int] = None,
+                    concurso_fim: Optional[int] = None, loteria: Optional[str] = None,
+                    conn=None) -> Dict[str, Dict[str, Any]]:
+        """
+        Audits every game in the bet files against every contest in
+        [concurso_inicio, concurso_fim] already stored in the local DB, in one
+        vectorized pass per lottery (no network). Open bounds mean the whole history.
+
+        Returns {loteria: result} with per-contest and aggregate prize totals.
+        """
+        from ..core.etl import carregar_mascaras
+
+        games_by_lottery: Dict[str, List[List[int]]] = {}
+        files_by_lottery: Dict[str, List[str]] = {}
+        skipped: Dict[str, int] = {}
+        for filepath in filepaths:
+            rejected = []
+            for file_lottery, jogos in self.parse_bet_file(filepath, loteria, rejected).items():
+                games = games_by_lottery.setdefault(file_lottery, [])
+                files = files_by_lottery.setdefault(file_lottery, [])
+                if os.path.basename(filepath) not in files:
+                    files.append(os.path.basename(filepath))
+                games.extend(self._number_bits(file_lottery, nums) for _, nums in jogos)
+            for file_lottery, _, _ in rejected:
+                skipped[file_lottery] = skipped.get(file_lottery, 0) + 1
+
+        results = {}
+        for lot, games in games_by_lottery.items():
+            concursos, draws = carregar_mascaras(lot, conn)
+            selected = np.ones(len(concursos), dtype=bool)
+            if concurso_inicio is not None:
+                selected &= concursos >= concurso_inicio
+            if concurso_fim is not None:
+                selected &= concursos <= concurso_fim
+            concursos, draws = concursos[selected], draws[selected]
+
+            # (games, contests) hit matrix -> prize matrix via lookup table
+            hits = count_hits(games_to_masks(games), draws)
+            prizes = self._prize_lookup(lot, int(hits.max(initial=0)))[hits]
+
+            per_contest = [
+                {
+                    'concurso': int(c),
+                    'prize': float(prizes[:, j].sum()),
+                    'winning_games': int((prizes[:, j] > 0).sum()),
+                    'best_hits': int(hits[:, j].max()) if len(games) else 0,
+                }
+                for j, c in enumerate(concursos)
+            ]
+            tiers = {}
+            for h in sorted(self.PRIZE_TABLE.get(lot, {})):
+                count = int((hits == h).sum())
+                if count:
+                    tiers[h] = count
+
+            total_prize = float(prizes.sum())
+            cost = len(games) * len(concursos) * CONFIG_LOTERIAS[lot]['preco']
+            results[lot] = {
+                'loteria': lot,
+                'files': files_by_lottery[lot],
+                'games': len(games),
+                'skipped_games': skipped.get(lot, 0),
+                'contests': len(concursos),
+                'first_contest': int(concursos[0]) if len(concursos) else None,
+                'last_contest': int(concursos[-1]) if len(concursos) else None,
+                'per_contest': per_contest,
+                'tiers': tiers,
+                'total_prize': total_prize,
+                'cost': cost,
+                'net': total_prize - cost,
+            }
+        return results
+
+    def format_range_report(self, results: Dict[str, Dict[str, Any]]) -> str:
+        """Markdown report for audit_range results."""
+        report = "# 🛡️ Bulk Audit Report (offline)\n\n"
+        for lot, r in results.items():
+            report += f"## {lot.upper()}\n"
+            report += f"**Files**: {', '.join(f'`{name}`' for name in r['files'])}\n"
+            report += f"**Games**: {r['games']}"
+            if r['skipped_games']:
+                report += f" ({r['skipped_games']} invalid rows skipped)"
+            report += "\n"
+            if not r['contests']:
+                report += "**Contests**: none in range\n\n"
+                continue
+            report += f"**Contests**: {r['first_contest']}–{r['last_contest']} ({r['contests']})\n\n"
+
+            report += "| Contest | Best Hits | Winning Games | Prize |\n| :--- | :--- | :--- | :--- |\n"
+            for c in r['per_contest']:
+                prize = f"💰 R$ {c['prize']:.2f}" if c['prize'] > 0 else "-"
+                report += f"| {c['concurso']} | {c['best_hits']:02d} | {c['winning_games']} | {prize} |\n"
+
+            report += "\n### 💰 Financial Summary\n"
+            for h, count in r['tiers'].items():
+                report += f"- {h:02d} hits: {count}x (R$ {self._calculate_profit(lot, h):.2f})\n"
+            report += f"**Total Prize**: R$ {r['total_prize']:.2f}\n"
+            report += f"**Total Cost**: R$ {r['cost']:.2f}\n"
+            report += f"**Net**: R$ {r['net']:.2f}\n\n"
+
+        audit_hash = hashlib.sha256(report.encode('utf-8')).hexdigest()[:16]
+        report += f"> **Integrity Hash**: `{audit_hash}`\n"
+        return report
@@ -1,17 +1,40 @@
 """
 Módulo de Backtest para validação pré-aposta (V6 Hybrid)
 Testa jogos gerados contra os últimos N sorteios históricos.
+
+Motor matricial: jogos (G x N) e concursos (D x N) viram matrizes 0/1 e a
+matriz completa de acertos (G x D) sai de uma única multiplicação.
 """
 
-import pandas as pd
-import json
+import numpy as np
 from typing import List, Dict
-from ..core.etl import get_db
+from ..core.config import CONFIG_LOTERIAS
+from ..core.snapshot import obter_snapshot
+from ..core.bitmask import games_to_matrix, masks_to_matrix
+
+def hits_matrix(game_matrix: np.ndarray, draw_matrix: np.ndarray, chunk_size: int = 1 << 24) -> np.ndarray:
+    """
+    Matriz de acertos (G x D) = jogos @ concursos.T.
+    Usa float32 (BLAS) e converte para uint8: contagens <= 100 são exatas.
+    """
+    games = np.asarray(game_matrix, dtype=np.float32)
+    draws_t = np.asarray(draw_matrix, dtype=np.float32).T
+    hits = np.empty((len(games), draws_t.shape[1]), dtype=np.uint8)
+    rows = max(1, chunk_size // max(1, draws_t.shape[1]))
+    for start in range(0, len(games), rows):
+        hits[start:start + rows] = games[start:start + rows] @ draws_t
+    return hits
+
+def hit_histograms(hits: np.ndarray, n_bins: int) -> np.ndarray:
+    """Histograma de acertos por jogo (G x n_bins) em uma única bincount."""
+    offsets = np.arange(len(hits), dtype=np.int64)[:, None] * n_bins
+    flat = (hits.astype(np.int64) + offsets).ravel()
+    return np.bincount(flat, minlength=len(hits) * n_bins).reshape(len(hits), n_bins)
 
 def run_backtest(games: List[List[int]], loteria: str, last_n: int = 50) -> Dict:
     """
     Executa backtest dos jogos contra os últimos N concursos.
-    Se last_n=0, carrega TODO o histórico (pode ser lento).
+    Se last_n=0, carrega TODO o histórico.
     
     Args:
         games: Lista de jogos gerados
@@ -20,51 +43,44 @@ def run_backtest(games: List[List[int]], loteria: str, last_n: int = 50) -> Dict
         
     Returns:
         Dict com estatísticas: {
-            'avg_hits': média de acertos,
-            'max_hits': melhor resultado,
-            'min_hits': pior resultado,
-            'per_game_stats': lista de dict por jogo
+            'global_avg': média global de acertos,
+            'global_max': melhor resultado,
+            'per_game_stats': lista de dict por jogo (avg/max/min + hit_histogram),
+            'tested_draws': concursos testados
         }
     """
-    conn = get_db()
-    query = f"SELECT dezenas FROM {loteria} ORDER BY concurso DESC"
+    # Reaproveita o histórico do snapshot em memória (mesma versão dos dados)
+    snapshot = obter_snapshot(loteria)
+    draw_masks = snapshot.mascaras if snapshot is not None else np.zeros((0, 0), dtype=np.uint64)
     if last_n > 0:
-        query += f" LIMIT {last_n}"
-        
-    df = pd.read_sql(query, conn)
-    conn.close()
+        draw_masks = draw_masks[-last_n:]
     
-    if df.empty:
+    if len(draw_masks) == 0:
         return {'error': 'No historical data'}
     
-    # Extrair resultados históricos
-    historical_results = []
-    for _, row in df.iterrows():
-        try:
-            result = json.loads(row['dezenas'])
-            historical_results.append(set(result))
-        except:
-            continue
+    total_nums = CONFIG_LOTERIAS[loteria]['total_nums']
+    game_matrix = games_to_matrix(games, total_nums)
+    draw_matrix = masks_to_matrix(draw_masks, total_nums)
+    
+    hits = hits_matrix(game_matrix, draw_matrix)
+    
+    # hit_histogram[k] = concursos em que o jogo fez k pontos
+    n_bins = int(min(game_matrix.sum(axis=1).max(initial=0), draw_matrix.sum(axis=1).max())) + 1
+    histograms = hit_histograms(hits, n_bins)
     
-    if not historical_results:
-        return {'error': 'Failed to parse historical data'}
+    if len(games):
+        avgs = hits.mean(axis=1)
+        maxs = hits.max(axis=1)
+        mins = hits.min(axis=1)
     
-    # Testar cada jogo
     per_game_stats = []
-    for idx, game in enumerate(games):
-        game_set = set(game)
-        hits_list = []
-        
-        for hist_result in historical_results:
-            hits = len(game_set.intersection(hist_result))
-            hits_list.append(hits)
-        
-        avg = sum(hits_list) / len(hits_list) if hits_list else 0
+    for idx in range(len(games)):
         per_game_stats.append({
             'game_index': idx,
-            'avg_hits': round(avg, 1),
-            'max_hits': max(hits_list) if hits_list else 0,
-            'min_hits': min(hits_list) if hits_list else 0
+            'avg_hits': round(float(avgs[idx]), 1),
+            'max_hits': int(maxs[idx]),
+            'min_hits': int(mins[idx]),
+            'hit_histogram': histograms[idx].tolist()
         })
     
     # Estatísticas globais
@@ -75,5 +91,5 @@ def run_backtest(games: List[List[int]], loteria: str, last_n: int = 50) -> Dict
         'global_avg': round(sum(all_avgs) / len(all_avgs), 1) if all_avgs else 0,
         'global_max': max(all_maxs) if all_maxs else 0,
         'per_game_stats': per_game_stats,
-        'tested_draws': len(historical_results)
+        'tested_draws': len(draw_masks)
     }
@@ -3,13 +3,20 @@ import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
+from ..core.bitmask import games_to_matrix
 
 class LotteryAI:
+    # Hiperparâmetros do modelo (fazem parte da chave do cache de modelos)
+    PARAMS = {'n_estimators': 100, 'random_state': 42}
+    # Versão do procedimento de treino (também entra na chave do cache).
+    # 2: amostras negativas e split semeados por random_state (treino determinístico)
+    VERSAO_TREINO = 2
+
     def __init__(self, history):
         """
         history: Lista de listas, ex: [[1,2,...], [3,4,...]]
         """
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+        self.model = RandomForestClassifier(**self.PARAMS)
         self.train(history)
         
     def _vectorize(self, jogo, total_nums=25):
@@ -30,11 +37,12 @@ class LotteryAI:
         # 2. Dataset Fake (Label 0) - Gerar jogos aleatórios para contrapor
         X_fake = []
         import random # Local import to keep clean
+        rng = random.Random(self.PARAMS['random_state'])
         sample_len = len(history[0]) if history else 15
         total_nums = 25 # Default Lotofacil
         
         for _ in range(len(history)):
-            fake_game = random.sample(range(1, total_nums+1), sample_len)
+            fake_game = rng.sample(range(1, total_nums+1), sample_len)
             X_fake.append(self._vectorize(fake_game))
         y_fake = [0] * len(X_fake)
         
@@ -42,7 +50,7 @@ class LotteryAI:
         X = np.array(X_real + X_fake)
         y = np.array(y_real + y_fake)
         
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=self.PARAMS['random_state'])
         self.model.fit(X_train, y_train)
         
         # print(f"   [AI] Acurácia Teste: {self.model.score(X_test, y_test):.2f}")
@@ -53,3 +61,17 @@ class LotteryAI:
         """
         vec = self._vectorize(jogo).reshape(1, -1)
         return self.model.predict_proba(vec)[0][1]
+
+    def predict_scores(self, jogos, total_nums=25):
+        """
+        Versão em lote do predict_score: uma única chamada predict_proba.
+        jogos: matriz 0/1 (N x total_nums) ou lista de jogos.
+        Retorna array (N,) com a probabilidade de cada jogo ser 'Real'.
+        """
+        if isinstance(jogos, np.ndarray) and jogos.ndim == 2 and jogos.shape[1] == total_nums:
+            X = jogos
+        else:
+            X = games_to_matrix(jogos, total_nums)
+        if len(X) == 0:
+            return np.zeros(0)
+        return self.model.predict_proba(X)[:, 1]
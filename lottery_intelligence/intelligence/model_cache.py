@@ -0,0 +1,98 @@
+"""
+Cache de Modelos Treinados (V6.1)
+Treinar o RandomForest do LotteryAI é o maior custo fixo de uma requisição
+Lotofácil. Os modelos ficam em memória e serializados em disco, com chave
+loteria + versão do histórico + hash dos hiperparâmetros: só há novo treino
+quando entra um concurso novo (ou os parâmetros mudam).
+
+O histórico do snapshot vigente é versionado pela versão dos dados do snapshot
+(versao_dados) e pelo último concurso, em O(1); um histórico injetado (ex:
+prefixo no backtest) é hasheado por inteiro.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List
+import joblib
+from ..core.config import MODEL_CACHE_DIR
+from .brain import LotteryAI
+
+_models: Dict[str, LotteryAI] = {}
+_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+def _versao_historico(loteria: str, history: List[List[int]]):
+    """Versão dos dados se `history` é o histórico do snapshot vigente, senão None."""
+    from ..core.snapshot import _snapshots  # Import tardio: snapshot -> generators -> model_cache
+    snapshot = _snapshots.get(loteria)
+    if snapshot is not None and snapshot.historico is history:
+        return snapshot.versao
+    return None
+
+def model_key(loteria: str, history: List[List[int]]) -> str:
+    """Chave do modelo: loteria + versão (ou hash) do histórico + hash dos hiperparâmetros."""
+    versao = _versao_historico(loteria, history)
+    if versao is not None:
+        # O último concurso entra na chave: o modelo em disco não vale para outra base com a mesma versão
+        identidade = [list(versao), [int(n) for n in history[-1]] if history else []]
+    else:
+        identidade = [[int(n) for n in h] for h in history]
+    h_hist = hashlib.sha256(json.dumps(identidade).encode()).hexdigest()[:16]
+    params = dict(LotteryAI.PARAMS, versao_treino=LotteryAI.VERSAO_TREINO)
+    h_params = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:8]
+    return f"{loteria}_{h_hist}_{h_params}"
+
+def _model_path(key: str) -> str:
+    return os.path.join(MODEL_CACHE_DIR, f"{key}.joblib")
+
+def _lock_for(key: str) -> threading.Lock:
+    with _registry_lock:
+        return _locks.setdefault(key, threading.Lock())
+
+def _load(key: str):
+    path = _model_path(key)
+    if not os.path.isfile(path):
+        return None
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        print(f"   [AI Cache] Modelo em disco ilegível ({e}), retreinando...")
+        return None
+
+def _save(loteria: str, key: str, model: LotteryAI):
+    try:
+        os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+        tmp_path = _model_path(key) + ".tmp"
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, _model_path(key))
+        # Remove versões antigas da mesma loteria
+        for old in glob.glob(os.path.join(MODEL_CACHE_DIR, f"{loteria}_*.joblib")):
+            if old != _model_path(key):
+                os.remove(old)
+    except OSError as e:
+        # Diretório read-only (ex: container): segue só com o cache em memória
+        print(f"   [AI Cache] Não foi possível salvar o modelo: {e}")
+
+def obter_modelo(loteria: str, history: List[List[int]]) -> LotteryAI:
+    """Retorna o LotteryAI treinado para este histórico (memória > disco > treino)."""
+    key = model_key(loteria, history)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock_for(key):
+        model = _models.get(key)
+        if model is None:
+            model = _load(key)
+        if model is None:
+            model = LotteryAI(history)
+            _save(loteria, key, model)
+
+        # Mantém em memória apenas o modelo vigente de cada loteria
+        for old_key in [k for k in _models if k.startswith(f"{loteria}_")]:
+            del _models[old_key]
+        _models[key] = model
+    return model
@@ -0,0 +1,167 @@
+"""
+Simulador Monte Carlo de Prêmios (V6.1)
+Estima o retorno de um portfolio sorteando concursos sintéticos uniformes.
+
+Cada bloco de sorteios (core/simulacao.py) vira uma matriz 0/1 (B x N); os
+acertos de todos os jogos saem de uma multiplicação (G x B), uma bincount conta
+os jogos por nº de acertos em cada sorteio e os prêmios saem dessas contagens e
+de uma tabela indexada por acertos (LotteryAuditor.PRIZE_TABLE). As
+tarefas de SIM_TAREFA sorteios rodam no pool compartilhado, cada uma com seu
+fluxo de RNG (SeedSequence.spawn): com o mesmo seed o resultado independe do
+nº de workers.
+"""
+
+import math
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from ..core.config import CONFIG_LOTERIAS, SIM_SORTEIOS, SIM_BLOCO, SIM_BLOCO_CELULAS
+from ..core.bitmask import games_to_matrix
+from ..core.pool import executar_tarefas
+from ..core.simulacao import FonteSorteios, dividir_tarefas
+from .backtest import hits_matrix
+from .auditor import LotteryAuditor
+
+Z_95 = 1.959963984540054
+
+def _wilson(sucessos: int, n: int, z: float = Z_95) -> List[float]:
+    """Intervalo de Wilson para uma proporção (não degenera com 0 sucessos)."""
+    if n == 0:
+        return [0.0, 1.0]
+    p = sucessos / n
+    denominador = 1 + z * z / n
+    centro = (p + z * z / (2 * n)) / denominador
+    margem = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominador
+    return [max(0.0, centro - margem), min(1.0, centro + margem)]
+
+def _tabela_premios(loteria: str, max_acertos: int) -> np.ndarray:
+    tabela = np.zeros(max_acertos + 1, dtype=np.float64)
+    for acertos, premio in LotteryAuditor.PRIZE_TABLE.get(loteria, {}).items():
+        if acertos <= max_acertos:
+            tabela[acertos] = premio
+    return tabela
+
+def _simular_tarefa(loteria: str, jogos: np.ndarray, faixas: np.ndarray, n: int,
+                    semente: np.random.SeedSequence) -> Dict[str, np.ndarray]:
+    """
+    Simula n sorteios (em outro processo) e devolve só somas suficientes:
+    o merge das tarefas é exato (contagens) e determinístico (somas em ordem fixa).
+    """
+    cfg = CONFIG_LOTERIAS[loteria]
+    fonte = FonteSorteios(cfg['total_nums'], cfg['sorteia'], semente)
+    tabela = _tabela_premios(loteria, int(jogos.sum(axis=1).max(initial=0)))
+    n_bins = len(tabela)
+    jogos_t = jogos.astype(np.float32)
+    # Bloco limitado por jogos x sorteios: a matriz de acertos (G x B) não cresce com o portfolio
+    bloco = max(1, min(SIM_BLOCO, SIM_BLOCO_CELULAS // max(1, len(jogos))))
+
+    soma = 0.0
+    soma_quadrados = 0.0
+    premiados = 0
+    faixa_portfolio = np.zeros(len(faixas), dtype=np.int64)  # sorteios com >= 1 jogo na faixa
+    faixa_jogos = np.zeros(len(faixas), dtype=np.int64)      # (jogo, sorteio) na faixa
+
+    feitos = 0
+    while feitos < n:
+        b = min(bloco, n - feitos)
+        sorteios = fonte.matriz(b)
+        acertos = hits_matrix(jogos_t, sorteios)  # (G, B)
+        # contagens[s, k] = jogos com k acertos no sorteio s (uma bincount por bloco)
+        offsets = np.arange(b, dtype=np.int64)[None, :] * n_bins
+        contagens = np.bincount((acertos + offsets).ravel(), minlength=b * n_bins).reshape(b, n_bins)
+        premio = contagens @ tabela               # prêmio do portfolio por sorteio
+        soma += float(premio.sum())
+        soma_quadrados += float(np.dot(premio, premio))
+        premiados += int((premio > 0).sum())
+        faixa_jogos += contagens[:, faixas].sum(axis=0)
+        faixa_portfolio += (contagens[:, faixas] > 0).sum(axis=0)
+        feitos += b
+
+    return {
+        'n': n,
+        'soma': soma,
+        'soma_quadrados': soma_quadrados,
+        'premiados': premiados,
+        'faixa_portfolio': faixa_portfolio,
+        'faixa_jogos': faixa_jogos,
+    }
+
+def simular_premios(games: List[List[int]], loteria: str, n_sorteios: int = SIM_SORTEIOS,
+                    seed: Optional[int] = None,
+                    progresso: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    Simulação Monte Carlo do portfolio contra n_sorteios concursos sintéticos.
+
+    Args:
+        games: Jogos do portfolio
+        loteria: Nome da loteria
+        n_sorteios: Concursos simulados
+        seed: Seed da simulação (None = entropia do SO)
+        progresso: Callback (sorteios_feitos, n_sorteios), chamado a cada tarefa concluída
+
+    Returns:
+        Dict com estatísticas: {
+            'expected_return' (+ '_ci95'): prêmio médio do portfolio por concurso,
+            'cost', 'return_per_cost': custo do portfolio e retorno por R$ apostado,
+            'p_any_prize' (+ '_ci95'): probabilidade de algum prêmio no concurso,
+            'tiers': por faixa, probabilidade de >= 1 jogo na faixa (p_portfolio)
+                     e de um jogo qualquer cair nela (p_per_game), com IC 95%,
+            'simulated_draws', 'games', 'seed'
+        }
+    """
+    if not games:
+        return {'error': 'No games to simulate'}
+    cfg = CONFIG_LOTERIAS[loteria]
+    jogos = games_to_matrix(games, cfg['total_nums'])
+    faixas = np.array(sorted(LotteryAuditor.PRIZE_TABLE.get(loteria, {})), dtype=np.int64)
+
+    tamanhos = dividir_tarefas(n_sorteios)
+    sementes = np.random.SeedSequence(seed).spawn(len(tamanhos))
+    args = [(loteria, jogos, faixas, n, semente) for n, semente in zip(tamanhos, sementes)]
+
+    feitos = 0
+    def ao_concluir(parcial):
+        nonlocal feitos
+        feitos += parcial['n']
+        if progresso is not None:
+            progresso(feitos, n_sorteios)
+
+    # Merge na ordem das tarefas: as somas em float ficam idênticas entre execuções
+    parciais = executar_tarefas(_simular_tarefa, args, ao_concluir)
+
+    n = sum(p['n'] for p in parciais)
+    if n == 0:
+        return {'error': 'No draws simulated'}
+    soma = sum(p['soma'] for p in parciais)
+    soma_quadrados = sum(p['soma_quadrados'] for p in parciais)
+    premiados = sum(p['premiados'] for p in parciais)
+    faixa_portfolio = sum(p['faixa_portfolio'] for p in parciais)
+    faixa_jogos = sum(p['faixa_jogos'] for p in parciais)
+
+    media = soma / n
+    variancia = max(0.0, soma_quadrados / n - media * media) * n / max(1, n - 1)
+    margem = Z_95 * math.sqrt(variancia / n)
+    custo = len(games) * cfg['preco']
+    tabela = LotteryAuditor.PRIZE_TABLE.get(loteria, {})
+
+    return {
+        'simulated_draws': n,
+        'games': len(games),
+        'seed': seed,
+        'cost': custo,
+        'expected_return': media,
+        'expected_return_ci95': [max(0.0, media - margem), media + margem],
+        'return_per_cost': media / custo if custo else 0.0,
+        'p_any_prize': premiados / n,
+        'p_any_prize_ci95': _wilson(premiados, n),
+        'tiers': [
+            {
+                'hits': int(h),
+                'prize': tabela[int(h)],
+                'p_portfolio': int(faixa_portfolio[i]) / n,
+                'p_portfolio_ci95': _wilson(int(faixa_portfolio[i]), n),
+                'p_per_game': int(faixa_jogos[i]) / (n * len(games)),
+                'p_per_game_ci95': _wilson(int(faixa_jogos[i]), n * len(games)),
+            }
+            for i, h in enumerate(faixas)
+        ],
+    }
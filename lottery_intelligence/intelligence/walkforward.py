@@ -0,0 +1,215 @@
+"""
+Backtest Walk-Forward (V6.1)
+Validação fora da amostra: para cada concurso t da faixa, as estatísticas e o
+modelo vêm só dos concursos anteriores a t, a estratégia gera o portfolio com
+seed fixo e o portfolio é conferido contra o sorteio t.
+
+Estado incremental: cada tarefa do pool (WALKFORWARD_BLOCO concursos seguidos)
+monta o StatsKernel uma vez e tira de cada t um snapshot de prefixo em
+O(total_nums x janelas); o LotteryAI (Lotofácil) é treinado uma vez por tarefa
+com os concursos anteriores ao primeiro dela. As sementes são derivadas de
+(seed, concurso): o resultado não depende do nº de workers.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Union
+import numpy as np
+from ..core.config import CONFIG_LOTERIAS, WALKFORWARD_BLOCO, WALKFORWARD_MIN_HISTORICO
+from ..core.bitmask import count_hits, games_to_masks, masks_to_games, masks_to_matrix
+from ..core.etl import carregar_mascaras
+from ..core.filters import FilterPipeline
+from ..core.hybrid import gerar_jogos_hybrid, gerar_v3_legacy_batch, gerar_v5_calibrated_batch
+from ..core.pool import executar_tarefas
+from ..core.stats import StatsKernel
+from .brain import LotteryAI
+from .montecarlo import _tabela_premios
+
+# Estratégia: estrategia(loteria, orcamento, stats, history, modelo, seed) -> jogos.
+# Funções de módulo (as tarefas rodam em outros processos e precisam ser picklable).
+Estrategia = Callable[..., List[List[int]]]
+
+def _estrategia_hybrid(loteria, orcamento, stats, history, modelo, seed):
+    jogos, _ = gerar_jogos_hybrid(loteria, orcamento, seed, stats, history, modelo, verbose=False)
+    return [j['numbers'] for j in jogos]
+
+def _estrategia_v3(loteria, orcamento, stats, history, modelo, seed):
+    qtd = int(orcamento // CONFIG_LOTERIAS[loteria]['preco'])
+    return gerar_v3_legacy_batch(loteria, qtd, stats, history, FilterPipeline(loteria),
+                                 np.random.default_rng(seed), modelo)
+
+def _estrategia_v5(loteria, orcamento, stats, history, modelo, seed):
+    qtd = int(orcamento // CONFIG_LOTERIAS[loteria]['preco'])
+    return gerar_v5_calibrated_batch(loteria, qtd, stats, history, FilterPipeline(loteria),
+                                     np.random.default_rng(seed), modelo)
+
+ESTRATEGIAS: Dict[str, Estrategia] = {
+    'hybrid': _estrategia_hybrid,
+    'v3_legacy': _estrategia_v3,
+    'v5_calibrated': _estrategia_v5,
+}
+
+def _semente_concurso(seed: int, concurso: int) -> int:
+    """Seed do portfolio de um concurso: mesma para todas as estratégias (comparação pareada)."""
+    return int(np.random.SeedSequence([seed, concurso]).generate_state(1, dtype=np.uint64)[0])
+
+def _walk_forward_tarefa(loteria: str, estrategias: Dict[str, Estrategia], orcamento: float,
+                         concursos: np.ndarray, mascaras: np.ndarray, indices: List[int],
+                         seed: int) -> Dict[str, Dict]:
+    """
+    Testa os concursos `indices` (posições em `mascaras`, em outro processo).
+    Só recebe o histórico até o último concurso da tarefa.
+    """
+    cfg = CONFIG_LOTERIAS[loteria]
+    kernel = StatsKernel(masks_to_matrix(mascaras, cfg['total_nums']))
+    historico = masks_to_games(mascaras)
+    modelo = LotteryAI(historico[:indices[0]]) if loteria == 'lotofacil' else None
+    tabela = _tabela_premios(loteria, cfg['total_nums'])
+
+    resultado = {nome: {'per_contest': [], 'hit_histogram': np.zeros(cfg['total_nums'] + 1, dtype=np.int64),
+                        'random_hits': 0.0}
+                 for nome in estrategias}
+    for t in indices:
+        stats = kernel.snapshot(t)
+        history = historico[:t]
+        semente = _semente_concurso(seed, int(concursos[t]))
+        sorteio = mascaras[t:t + 1]
+
+        for nome, estrategia in estrategias.items():
+            jogos = estrategia(loteria, orcamento, stats, history, modelo, semente)
+            acertos = count_hits(games_to_masks(jogos), sorteio)[:, 0] if jogos else np.zeros(0, dtype=np.int64)
+            premios = tabela[acertos]
+
+            r = resultado[nome]
+            r['hit_histogram'] += np.bincount(acertos, minlength=len(r['hit_histogram']))
+            # Esperado ao acaso: cada dezena apostada sai com probabilidade sorteia / total_nums
+            r['random_hits'] += sum(len(j) for j in jogos) * cfg['sorteia'] / cfg['total_nums']
+            r['per_contest'].append({
+                'concurso': int(concursos[t]),
+                'games': len(jogos),
+                'avg_hits': float(acertos.mean()) if len(jogos) else 0.0,
+                'best_hits': int(acertos.max(initial=0)),
+                'winning_games': int((premios > 0).sum()),
+                'prize': float(premios.sum()),
+            })
+    return resultado
+
+def run_walk_forward(loteria: str, concurso_inicio: Optional[int] = None, concurso_fim: Optional[int] = None,
+                     estrategias: Iterable[Union[str, Estrategia]] = ('v3_legacy', 'v5_calibrated'),
+                     orcamento: Optional[float] = None, seed: Optional[int] = None,
+                     progresso: Optional[Callable[[int, int], None]] = None, conn=None) -> Dict:
+    """
+    Backtest walk-forward (fora da amostra) das estratégias na faixa de concursos.
+
+    Args:
+        loteria: Nome da loteria
+        concurso_inicio / concurso_fim: Faixa testada (None = aberta); os
+            primeiros WALKFORWARD_MIN_HISTORICO concursos só servem de histórico
+        estrategias: Nomes de ESTRATEGIAS ou funções com a mesma assinatura
+        orcamento: Orçamento por concurso (default: orcamento_alvo da loteria)
+        seed: Seed da execução (None = entropia do SO, devolvida em 'seed')
+        progresso: Callback (concursos_feitos, total), chamado a cada tarefa concluída
+
+    Returns:
+        Dict com estatísticas: {
+            'tested_draws', 'first_contest', 'last_contest', 'budget', 'seed',
+            'strategies': por estratégia {
+                'global_avg' / 'global_max': acertos por jogo (média / melhor),
+                'random_avg': média esperada de jogos aleatórios do mesmo tamanho,
+                'hit_histogram': jogos por nº de acertos,
+                'total_prize', 'cost', 'net', 'return_per_cost',
+                'per_contest': lista por concurso (avg/best hits, prêmios)
+            }
+        }
+    """
+    cfg = CONFIG_LOTERIAS[loteria]
+    orcamento = cfg['orcamento_alvo'] if orcamento is None else orcamento
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1, dtype=np.uint64)[0])
+    funcoes = {}
+    for estrategia in estrategias:
+        if isinstance(estrategia, str):
+            if estrategia not in ESTRATEGIAS:
+                raise ValueError(f"Estratégia desconhecida: {estrategia} (disponíveis: {', '.join(ESTRATEGIAS)})")
+            funcoes[estrategia] = ESTRATEGIAS[estrategia]
+        else:
+            funcoes[estrategia.__name__] = estrategia
+    if not funcoes:
+        raise ValueError("Nenhuma estratégia para testar")
+
+    concursos, mascaras = carregar_mascaras(loteria, conn)
+    selecionados = np.arange(len(concursos)) >= WALKFORWARD_MIN_HISTORICO
+    if concurso_inicio is not None:
+        selecionados &= concursos >= concurso_inicio
+    if concurso_fim is not None:
+        selecionados &= concursos <= concurso_fim
+    indices = np.flatnonzero(selecionados).tolist()
+    if not indices:
+        return {'error': 'No contests to test (range empty or history too short)'}
+
+    # Tarefas fixas pela faixa (não pelo nº de workers); cada uma leva só o prefixo que usa
+    blocos = [indices[i:i + WALKFORWARD_BLOCO] for i in range(0, len(indices), WALKFORWARD_BLOCO)]
+    tarefas = [(loteria, funcoes, orcamento, concursos[:b[-1] + 1], mascaras[:b[-1] + 1], b, seed)
+               for b in blocos]
+
+    feitos = 0
+    def ao_concluir(parcial):
+        nonlocal feitos
+        feitos += len(next(iter(parcial.values()))['per_contest'])
+        if progresso is not None:
+            progresso(feitos, len(indices))
+
+    parciais = executar_tarefas(_walk_forward_tarefa, tarefas, ao_concluir)
+
+    resultado_estrategias = {}
+    for nome in funcoes:
+        per_contest = [c for p in parciais for c in p[nome]['per_contest']]
+        histograma = sum(p[nome]['hit_histogram'] for p in parciais)
+        total_jogos = int(histograma.sum())
+        total_premios = sum(c['prize'] for c in per_contest)
+        custo = total_jogos * cfg['preco']
+        acertos = np.arange(len(histograma))
+        ultimo = int(np.flatnonzero(histograma).max(initial=0))
+        resultado_estrategias[nome] = {
+            'global_avg': round(float((acertos * histograma).sum()) / total_jogos, 3) if total_jogos else 0,
+            'global_max': ultimo,
+            'random_avg': round(sum(p[nome]['random_hits'] for p in parciais) / total_jogos, 3) if total_jogos else 0,
+            'games': total_jogos,
+            'hit_histogram': histograma[:ultimo + 1].tolist(),
+            'total_prize': total_premios,
+            'cost': custo,
+            'net': total_premios - custo,
+            'return_per_cost': total_premios / custo if custo else 0.0,
+            'per_contest': per_contest,
+        }
+
+    return {
+        'loteria': loteria,
+        'tested_draws': len(indices),
+        'first_contest': int(concursos[indices[0]]),
+        'last_contest': int(concursos[indices[-1]]),
+        'budget': orcamento,
+        'seed': seed,
+        'strategies': resultado_estrategias,
+    }
+
+def format_walk_forward_report(resultado: Dict) -> str:
+    """Relatório markdown do run_walk_forward (comparação entre estratégias)."""
+    if 'error' in resultado:
+        return f"❌ {resultado['error']}\n"
+    report = f"# 🔬 Backtest Walk-Forward - {resultado['loteria'].upper()}\n"
+    report += f"**Concursos**: {resultado['first_contest']}–{resultado['last_contest']} ({resultado['tested_draws']})\n"
+    report += f"**Orçamento por concurso**: R$ {resultado['budget']:.2f}\n"
+    report += f"**Seed**: {resultado['seed']}\n\n"
+
+    report += "| Estratégia | Jogos | Média | Acaso | Máx | Prêmios | Custo | Retorno/R$ |\n"
+    report += "| :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- |\n"
+    for nome, r in resultado['strategies'].items():
+        report += (f"| {nome} | {r['games']} | {r['global_avg']:.3f} | {r['random_avg']:.3f} | {r['global_max']} "
+                   f"| R$ {r['total_prize']:.2f} | R$ {r['cost']:.2f} | {r['return_per_cost']:.3f} |\n")
+
+    for nome, r in resultado['strategies'].items():
+        report += f"\n## {nome}\n"
+        total = max(1, r['games'])
+        for h, n in enumerate(r['hit_histogram']):
+            if n:
+                report += f"- {h:02d} acertos: {n} jogos ({n / total:.2%})\n"
+    return report
@@ -2,6 +2,7 @@
 import argparse
 import sys
 import os
+import time
 import datetime
 
 # Adiciona o diretório pai ao path para importar pacotes
@@ -13,9 +14,19 @@ from lottery_intelligence.core.generators import gerar_jogos
 from lottery_intelligence.narrative.interpretation import interpretar_resultados
 from lottery_intelligence.core.coverage import CoverageEngine
 
+def _parse_faixa(faixa):
+    """'INICIO:FIM' -> (inicio, fim); lados vazios = faixa aberta, 'N' = só o concurso N."""
+    inicio, _, fim = faixa.partition(':')
+    inicio = int(inicio) if inicio.strip() else None
+    fim = int(fim) if fim.strip() else (inicio if ':' not in faixa else None)
+    return inicio, fim
+
 def main():
     parser = argparse.ArgumentParser(description="Lottery Intelligence V6.0 CLI (Hybrid)")
     
+    parser.add_argument('comando', nargs='?', choices=['sync'],
+                        help='sync: sincroniza todas as loterias (em paralelo) e sai')
+
     parser.add_argument('--loteria', type=str, default='lotofacil', 
                         choices=CONFIG_LOTERIAS.keys(),
                         help='Loteria alvo (default: lotofacil)')
@@ -29,47 +40,146 @@ def main():
                         
     parser.add_argument('--offline', action='store_true',
                         help='Não baixar dados (usar DB local)')
+    parser.add_argument('--full-sync', action='store_true',
+                        help='Sincronização completa: ignora ETag/hash e compara todo o histórico')
 
-    parser.add_argument('--audit', type=str,
-                        help='Arquivo para auditar (ignora geração)')
+    parser.add_argument('--audit', type=str, nargs='+',
+                        help='Arquivo(s) para auditar (ignora geração)')
+    parser.add_argument('--range', type=str,
+                        help='Auditoria offline contra a faixa de concursos do DB local: INICIO:FIM (ex: 3000:3050, 3000: ou :3050)')
     parser.add_argument('--concurso', type=str, default='latest',
                         help='Número do concurso para auditoria (default: latest)')
     
     parser.add_argument('--skip-backtest', action='store_true',
                         help='Pular validação de backtest (modo híbrido)')
+
+    parser.add_argument('--walk-forward', type=str, metavar='INICIO:FIM',
+                        help='Backtest walk-forward (fora da amostra) na faixa de concursos do DB local (ex: 2500:3000)')
+    parser.add_argument('--strategies', type=str, nargs='+', default=['v3_legacy', 'v5_calibrated'],
+                        choices=['hybrid', 'v3_legacy', 'v5_calibrated'],
+                        help='Estratégias comparadas no walk-forward (default: v3_legacy v5_calibrated)')
+
+    parser.add_argument('--simulate', type=int, default=0, metavar='N',
+                        help='Simulação Monte Carlo do portfolio com N concursos sintéticos (modo híbrido)')
+
+    parser.add_argument('--seed', type=int,
+                        help='Seed para geração reprodutível (modo híbrido)')
+
+    parser.add_argument('--build-index', action='store_true',
+                        help='Pré-computar o índice de combinações da Lotofácil e sair')
                         
     args = parser.parse_args()
     
+    if args.comando == 'sync':
+        import sqlite3
+        from lottery_intelligence.core.config import DB_PATH
+        from lottery_intelligence.core.etl import sincronizar
+        inicio = time.perf_counter()
+        try:
+            resultados = sincronizar(completo=args.full_sync)
+        except sqlite3.OperationalError as e:
+            print(f"[SYNC] Base sem permissão de escrita ({DB_PATH}): {e}")
+            sys.exit(1)
+        falhas = [loteria for loteria, r in resultados.items() if r is None]
+        print(f"[SYNC] {len(resultados) - len(falhas)}/{len(resultados)} loterias sincronizadas "
+              f"em {time.perf_counter() - inicio:.2f}s.")
+        if falhas:
+            print(f"[SYNC] Falharam: {', '.join(falhas)}")
+            sys.exit(1)
+        return
+
+    if args.build_index:
+        from lottery_intelligence.core.combination_index import build_index
+        build_index()
+        return
+
     # 0. Audit Mode (V5.4)
+    if args.audit and args.range:
+        print(f"=== LOTTERY AUDITOR (OFFLINE RANGE) ===")
+        print(f"Files: {', '.join(args.audit)}")
+        from lottery_intelligence.intelligence.auditor import LotteryAuditor
+
+        try:
+            inicio, fim = _parse_faixa(args.range)
+
+            auditor = LotteryAuditor()
+            report = auditor.format_range_report(auditor.audit_range(args.audit, inicio, fim))
+            print("\n" + report)
+
+            log_name = f"audit_range_{args.range.replace(':', '-')}.log"
+            with open(log_name, "w") as f:
+                f.write(report)
+            print(f"\n[Log] Salvo em: {log_name}")
+
+        except Exception as e:
+            print(f"❌ Erro na auditoria: {e}")
+            sys.exit(1)
+
+        return  # Exit after audit
+
     if args.audit:
         print(f"=== LOTTERY AUDITOR V5.4 ===")
-        print(f"File: {args.audit}")
         from lottery_intelligence.intelligence.auditor import LotteryAuditor
         
         try:
             auditor = LotteryAuditor()
-            report = auditor.audit_file(args.audit, args.concurso)
-            print("\\n" + report)
-            
-            # Salvar log
-            log_name = f"audit_{args.concurso}_{os.path.basename(args.audit).replace('.md', '')}.log"
+            print(f"Files: {', '.join(args.audit)}")
+            # Uma chamada para todos os arquivos: o resultado oficial de cada
+            # loteria é buscado uma vez só
+            report = auditor.audit_files(args.audit, args.concurso)
+            print("\n" + report)
+
+            # Salvar log (um só, com os relatórios de todos os arquivos)
+            if len(args.audit) == 1:
+                log_name = f"audit_{args.concurso}_{os.path.basename(args.audit[0]).replace('.md', '')}.log"
+            else:
+                log_name = f"audit_{args.concurso}_{len(args.audit)}_arquivos.log"
             with open(log_name, "w") as f:
                 f.write(report)
-            print(f"\\n[Log] Salvo em: {log_name}")
-            
+            print(f"\n[Log] Salvo em: {log_name}")
+
         except Exception as e:
             print(f"❌ Erro na auditoria: {e}")
             sys.exit(1)
             
         return  # Exit after audit
 
+    # Walk-forward: cada concurso da faixa testado só com o histórico anterior a ele
+    if args.walk_forward:
+        print(f"=== WALK-FORWARD BACKTEST [{args.loteria.upper()}] ===")
+        from lottery_intelligence.intelligence.walkforward import run_walk_forward, format_walk_forward_report
+
+        try:
+            inicio, fim = _parse_faixa(args.walk_forward)
+            t0 = time.perf_counter()
+            resultado = run_walk_forward(
+                args.loteria, inicio, fim, args.strategies, orcamento=args.budget, seed=args.seed,
+                progresso=lambda feitos, total: print(f"   [Walk-Forward] {feitos}/{total} concursos ({feitos / total:.0%})")
+            )
+            report = format_walk_forward_report(resultado)
+            print("\n" + report)
+            print(f"[Walk-Forward] Concluído em {time.perf_counter() - t0:.2f}s.")
+            if 'error' in resultado:
+                sys.exit(1)
+
+            log_name = f"walkforward_{args.loteria}_{args.walk_forward.replace(':', '-')}.log"
+            with open(log_name, "w") as f:
+                f.write(report)
+            print(f"[Log] Salvo em: {log_name}")
+
+        except ValueError as e:
+            print(f"❌ Erro no walk-forward: {e}")
+            sys.exit(1)
+
+        return
+
     # V6.0 HYBRID MODE
     if args.mode == 'hybrid':
         print(f"=== LOTTERY INTELLIGENCE V6.0 [HYBRID] ===")
         
         if not args.offline:
             conn = setup_db()
-            baixar_e_salvar(args.loteria, conn)
+            baixar_e_salvar(args.loteria, conn, completo=args.full_sync)
             conn.close()
         else:
             print("[OFFLINE] Usando base de dados local.")
@@ -79,7 +189,7 @@ def main():
         from lottery_intelligence.core.hybrid import gerar_jogos_hybrid
         from lottery_intelligence.intelligence.backtest import run_backtest
         
-        games_with_meta, stats_info = gerar_jogos_hybrid(args.loteria, args.budget or 30.0)
+        games_with_meta, stats_info = gerar_jogos_hybrid(args.loteria, args.budget or 30.0, seed=args.seed)
         
         # Extrair apenas os números para backtest
         games_only = [g['numbers'] for g in games_with_meta]
@@ -90,6 +200,16 @@ def main():
             print(f"   [Backtest] Validando contra TODO o histórico...")
             backtest_results = run_backtest(games_only, args.loteria, last_n=0)
         
+        # Simulação Monte Carlo (opcional)
+        simulation = None
+        if args.simulate > 0:
+            from lottery_intelligence.intelligence.montecarlo import simular_premios
+            print(f"   [Simulação] {args.simulate} concursos sintéticos...")
+            simulation = simular_premios(
+                games_only, args.loteria, args.simulate, seed=args.seed,
+                progresso=lambda feitos, total: print(f"   [Simulação] {feitos}/{total} ({feitos / total:.0%})")
+            )
+        
         # Report híbrido
         print(f"\n# 🎱 Relatório Hybrid V6.0 - {args.loteria.upper()}")
         print(f"--------------------------------------------------")
@@ -97,13 +217,24 @@ def main():
         report = f"# 🎱 Relatório Hybrid V6.0\n"
         report += f"**Data**: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M')}\n"
         report += f"**Loteria**: {args.loteria.upper()}\n"
-        report += f"**Modo**: HYBRID (30% V3 Legacy / 70% V5 Calibrated)\n\n"
+        report += f"**Modo**: HYBRID (30% V3 Legacy / 70% V5 Calibrated)\n"
+        if args.seed is not None:
+            report += f"**Seed**: {args.seed}\n"
+        report += "\n"
         
         report += f"## 📊 Composição do Portfólio\n"
         report += f"- **Total de Jogos**: {stats_info['total_games']}\n"
         report += f"- **V3 Legacy** (Safety): {stats_info['v3_count']} jogos\n"
         report += f"- **V5 Calibrated** (Hedge): {stats_info['v5_count']} jogos\n\n" 
         
+        if stats_info.get('filters'):
+            report += "## 🧹 Pipeline de Filtros\n"
+            report += "| Estágio | Avaliados | Rejeitados | Taxa | Custo (µs/jogo) |\n"
+            report += "| :--- | :--- | :--- | :--- | :--- |\n"
+            for f in stats_info['filters']:
+                report += f"| {f['nome']} | {f['avaliados']} | {f['rejeitados']} | {f['taxa_rejeicao']:.1%} | {f['custo_us']} |\n"
+            report += "\n"
+        
         if backtest_results and 'error' not in backtest_results:
             hist_summary = f"- Backtest ({backtest_results['tested_draws']} Concursos): Média {backtest_results['global_avg']} pts | Max {backtest_results['global_max']} pts"
             print(hist_summary)
@@ -111,6 +242,20 @@ def main():
             report += f"- **Média Global**: {backtest_results['global_avg']} pontos\n"
             report += f"- **Melhor Performance**: {backtest_results['global_max']} pontos\n\n"
         
+        if simulation and 'error' not in simulation:
+            ic_ret = simulation['expected_return_ci95']
+            ic_any = simulation['p_any_prize_ci95']
+            report += f"## 🎲 Simulação Monte Carlo ({simulation['simulated_draws']} Concursos)\n"
+            report += f"- **Retorno Esperado**: R$ {simulation['expected_return']:.2f} por concurso (IC 95%: R$ {ic_ret[0]:.2f} – R$ {ic_ret[1]:.2f})\n"
+            report += f"- **Custo do Portfólio**: R$ {simulation['cost']:.2f} (retorno de R$ {simulation['return_per_cost']:.3f} por R$ 1)\n"
+            report += f"- **P(algum prêmio)**: {simulation['p_any_prize']:.4%} (IC 95%: {ic_any[0]:.4%} – {ic_any[1]:.4%})\n\n"
+            report += "| Acertos | Prêmio | P(portfólio) | IC 95% | P(por jogo) |\n"
+            report += "| :--- | :--- | :--- | :--- | :--- |\n"
+            for t in simulation['tiers']:
+                report += (f"| {t['hits']} | R$ {t['prize']:.2f} | {t['p_portfolio']:.3e} | "
+                           f"{t['p_portfolio_ci95'][0]:.3e} – {t['p_portfolio_ci95'][1]:.3e} | {t['p_per_game']:.3e} |\n")
+            report += "\n"
+        
         report += "## 📐 Jogos Gerados\n\n"
         report += "| # | Tag | Dezenas |\n"
         report += "| :--- | :--- | :--- |\n"
@@ -185,7 +330,7 @@ def main():
     # 1. Setup & ETL
     if not args.offline:
         conn = setup_db()
-        baixar_e_salvar(args.loteria, conn)
+        baixar_e_salvar(args.loteria, conn, completo=args.full_sync)
         conn.close()
     else:
         print("[OFFLINE] Usando base de dados local.")
@@ -7,8 +7,14 @@ BUDGET_LOTOMANIA=30.00
 echo "🦁 LOTTERY INTELLIGENCE V6 AUTOMATION 🦁"
 echo "=========================================="
 
+# 0. Sync (all lotteries, concurrently; generation below runs offline)
+echo "Syncing lottery data..."
+if ! ./mega_venv/bin/python3 lottery_intelligence/interface/cli.py sync; then
+    echo "⚠️  Sync failed for some sources, using local data for those."
+fi
+
 # 1. Lotofacil
-echo "Running Lotofacil Generation..."
+echo -e "\nRunning Lotofacil Generation..."
 ./mega_venv/bin/python3 lottery_intelligence/interface/cli.py --loteria lotofacil --mode hybrid --budget $BUDGET_LOTOFACIL --offline
 
 # 2. Lotomania